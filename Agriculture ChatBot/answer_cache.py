@@ -0,0 +1,252 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+
+from entity_index import (
+    COMMODITY_ALIASES, COMMON_WORDS, MIN_FUZZY_LENGTH, STATE_ALIASES,
+    edit_distance, max_edits, stem, tokenize,
+)
+from prompts import FEW_SHOT_MESSAGES, LLM_MODEL
+
+NGRAM = 3
+CANDIDATE_GRAMS = 8
+PUNCTUATION = re.compile(r"[^\w\s]|_", re.UNICODE)
+SPACES = re.compile(r"\s+")
+
+
+def prompt_fingerprint(messages=FEW_SHOT_MESSAGES, model=LLM_MODEL):
+    """Changes whenever the model or the few-shot prompt does, retiring old answers."""
+    payload = json.dumps([model, messages], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_question(text):
+    text = unicodedata.normalize("NFC", text).lower()
+    text = PUNCTUATION.sub(" ", text)
+    return SPACES.sub(" ", text).strip()
+
+
+def char_ngrams(text):
+    padded = f" {text} "
+    return Counter(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+
+# Farming vocabulary where a one-letter difference is a different word,
+# on top of the entity names and common query words of entity_index.
+AGRONOMY_TERMS = (
+    "irrigate", "irrigation", "fertilizer", "pesticide", "insecticide",
+    "fungicide", "herbicide", "weedicide", "sowing", "harvest", "manure",
+    "compost", "potash", "phosphate", "nitrogen", "organic", "spray",
+    "yield", "disease", "insect", "aphid", "termite", "blight", "mildew",
+    "drip", "sprinkler", "kharif", "rabi", "zaid", "monsoon", "rainfall",
+    "drought", "frost", "grain", "seeds", "plant", "plants", "crop", "soil",
+    "water", "before", "after", "early", "later", "month", "acre", "hectare",
+    "bigha", "quintal", "litre", "liter", "grams", "dose", "store", "storage",
+)
+
+
+def _known_words():
+    words = set(COMMON_WORDS) | set(AGRONOMY_TERMS)
+    for name, aliases in list(STATE_ALIASES.items()) + list(COMMODITY_ALIASES.items()):
+        for phrase in [name] + aliases:
+            words.update(tokenize(phrase))
+    return frozenset(words)
+
+
+KNOWN_WORDS = _known_words()
+
+
+def typo_of(a, b):
+    """
+    True when two differing tokens are one word spelled two ways. Only
+    longer, digit-free tokens qualify, and never two real words: "weed" vs
+    "seed" or "grain" vs "rain" are different questions.
+    """
+    if stem(a) == stem(b):
+        return True
+    if min(len(a), len(b)) < MIN_FUZZY_LENGTH:
+        return False
+    if any(ch.isdigit() for ch in a + b):
+        return False
+    if a in KNOWN_WORDS and b in KNOWN_WORDS:
+        return False
+    return edit_distance(a, b) <= max(1, max_edits(min(a, b, key=len)))
+
+
+def same_terms(a, b):
+    """
+    Guard for the similarity tier. Trigram overlap alone rates "should I
+    not irrigate wheat" close to "should I irrigate wheat" and "2 acre"
+    close to "5 acre", so every token only one question has, stop words and
+    numbers included, must be a typo of a token only the other has.
+    """
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    only_a, only_b = tokens_a - tokens_b, tokens_b - tokens_a
+    return (all(any(typo_of(x, y) for y in only_b) for x in only_a)
+            and all(any(typo_of(y, x) for x in only_a) for y in only_b))
+
+
+class CacheEntry:
+    __slots__ = ("answer", "expires_at", "partition", "vector")
+
+    def __init__(self, answer, expires_at, partition, vector):
+        self.answer = answer
+        self.expires_at = expires_at
+        self.partition = partition
+        self.vector = vector
+
+
+class AnswerCache:
+    """
+    LLM answers keyed on (normalized question, language, prompt fingerprint).
+
+    The exact tier is an LRU dict with a TTL. The optional similarity tier
+    keeps character trigram TF-IDF vectors of the cached questions in an
+    inverted index, so a paraphrase ("when should I sow wheat" vs "wheat
+    sowing time?") whose cosine similarity reaches `similarity` gets the
+    stored answer. Vectors are weighted with the IDF at insertion time,
+    which drifts a little as the cache fills; that is fine for a threshold
+    test. A candidate must also have the same words as the question up to
+    spelling slips (see same_terms). similarity=0 turns the tier off.
+    """
+
+    def __init__(self, max_size=2000, ttl=7 * 24 * 3600, similarity=0.82,
+                 fingerprint=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity = similarity
+        self.fingerprint = fingerprint or prompt_fingerprint()
+
+        self._entries = OrderedDict()
+        self._postings = {}       # (partition, ngram) -> {key: weight}
+        self._doc_freq = Counter()  # (partition, ngram) -> number of questions
+        self._docs = Counter()      # partition -> number of questions
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _key(self, question, lang):
+        return (normalize_question(question), lang, self.fingerprint)
+
+    def _vector(self, partition, text):
+        docs = self._docs[partition] + 1
+        weights = {
+            gram: (1 + math.log(count)) * math.log(1 + docs / (1 + self._doc_freq[(partition, gram)]))
+            for gram, count in char_ngrams(text).items()
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {gram: w / norm for gram, w in weights.items()}
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        if entry.vector is None:
+            return
+        for gram in entry.vector:
+            posting = self._postings.get((entry.partition, gram))
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self._postings[(entry.partition, gram)]
+            self._doc_freq[(entry.partition, gram)] -= 1
+            if self._doc_freq[(entry.partition, gram)] <= 0:
+                del self._doc_freq[(entry.partition, gram)]
+        self._docs[entry.partition] -= 1
+
+    def _most_similar(self, partition, text, now):
+        query = self._vector(partition, text)
+
+        # Candidates come from the rarest query trigrams only; grams shared by
+        # most cached questions (" wh", "the") would touch every entry. A
+        # paraphrase above the threshold shares nearly all grams, rare ones
+        # included, so it is still found and then scored exactly.
+        rarest = sorted(query, key=lambda gram: self._doc_freq[(partition, gram)])
+        candidates = set()
+        for gram in rarest[:CANDIDATE_GRAMS]:
+            candidates.update(self._postings.get((partition, gram), ()))
+
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            score = sum(weight * entry.vector.get(gram, 0.0) for gram, weight in query.items())
+            if (score >= self.similarity and score > best_score
+                    and entry.expires_at > now and same_terms(text, key[0])):
+                best_key, best_score = key, score
+        return best_key, best_score
+
+    def get(self, question, lang="en"):
+        key = self._key(question, lang)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key)
+                entry = None
+
+            if entry is None and self.similarity and key[0]:
+                similar_key, _ = self._most_similar(key[1:], key[0], now)
+                if similar_key is not None:
+                    entry = self._entries[similar_key]
+                    key = similar_key
+                    self.similar_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry.answer
+
+    def put(self, question, lang, answer):
+        if not answer:
+            return
+
+        key = self._key(question, lang)
+        partition = key[1:]
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            vector = None
+            if self.similarity and key[0]:
+                vector = self._vector(partition, key[0])
+                for gram, weight in vector.items():
+                    self._postings.setdefault((partition, gram), {})[key] = weight
+                    self._doc_freq[(partition, gram)] += 1
+                self._docs[partition] += 1
+
+            self._entries[key] = CacheEntry(answer, time.time() + self.ttl, partition, vector)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "similarity": self.similarity,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+answer_cache = AnswerCache(
+    max_size=int(os.getenv("ANSWER_CACHE_SIZE", 2000)),
+    ttl=int(os.getenv("ANSWER_CACHE_TTL", 7 * 24 * 3600)),
+    similarity=float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.82)),
+)
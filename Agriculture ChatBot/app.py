@@ -1,17 +1,26 @@
 import os
-import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
-from functools import lru_cache
 from datetime import datetime
-from bs4 import BeautifulSoup
-from xml.etree import ElementTree as ET
+import threading
 import time
-from math import floor
-import json
 from datetime import timedelta
 
+from mandi_store import MandiStore, SORTABLE_AGGREGATES
+from mandi_aggregates import AGGREGATE_WINDOWS
+from ttl_cache import TTLCache
+from upstream import upstreams
+from prompts import build_messages
+from answer_cache import answer_cache
+from voice_pipeline import get_voice_pipeline
+from audio_cache import get_audio_cache
+from news_feed import NewsFeed
+from session_store import SessionContext, create_session_store, new_session_token, valid_session_token
+from entity_index import STATE_INDEX, MandiEntityIndexes, tokenize
+from mandi_refresh import MandiBusyError, MandiRefresher
+from mandi_ingest import MandiIngestor
+
 
 load_dotenv()
 
@@ -19,21 +28,59 @@ app = Flask(__name__)
 
 # For local dev keep open. For deployment tighten allowed origins.
 CORS(app)
-CACHE_FILE = "mandi_cache.json"
+MANDI_DB_PATH = os.environ.get("MANDI_DB_PATH", "mandi_cache.db")
 CACHE_DURATION = timedelta(hours=24)
+MANDI_PREFETCH = os.environ.get("MANDI_PREFETCH", "1") == "1"
+MANDI_REFRESH_INTERVAL = int(os.environ.get("MANDI_REFRESH_INTERVAL", 900))
 DATA_GOV_API_KEY = os.environ.get("DATA_GOV_API_KEY", "")
+DATA_GOV_BASE_URL = os.environ.get("DATA_GOV_BASE_URL", "https://api.data.gov.in")
+MANDI_PAGE_SIZE = int(os.environ.get("MANDI_PAGE_SIZE", 1000))
+MANDI_SYNC_WORKERS = int(os.environ.get("MANDI_SYNC_WORKERS", 4))
 MANDI_RESOURCE_ID = "9ef84268-d588-465a-a308-a864a43d0070"
 SUPPORTED_STATES = ["Punjab", "Rajasthan", "Gujarat"]
-WEATHER_CACHE = {}
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
 WEATHER_TTL = 300  # 5 minutes
-# Simple per-IP in-memory context
-USER_CONTEXT = {}
+WEATHER_GRID_DEG = float(os.environ.get("WEATHER_GRID_DEG", 0.1))
+NEWS_PREFETCH = os.environ.get("NEWS_PREFETCH", "1") == "1"
+NEWS_REFRESH_INTERVAL = int(os.environ.get("NEWS_REFRESH_INTERVAL", 600))
+NEWS_MAX_ITEMS = int(os.environ.get("NEWS_MAX_ITEMS", 100))
+NEWS_RETRY_SECONDS = int(os.environ.get("NEWS_RETRY_SECONDS", 15))
+WEATHER_CACHE = TTLCache(max_size=int(os.environ.get("WEATHER_CACHE_SIZE", 2048)), ttl=WEATHER_TTL)
+# Conversation context per session token (SESSION_BACKEND: sqlite | memory)
+SESSION_COOKIE = "session_token"
+session_store = create_session_store()
+VOICE_PRERENDER = os.environ.get("VOICE_PRERENDER", "1") == "1"
+
+# Fixed /chat replies; synthesized once at startup so /speak serves them from the audio cache
+LOCATION_PROMPT = {
+    "en": "Please allow location access to fetch weather.",
+    "hi": "मौसम जानने के लिए कृपया लोकेशन की अनुमति दें।",
+    "gu": "હવામાન જાણવા માટે કૃપા કરીને લોકેશન પરવાનગી આપો."
+}
+MARKET_PROMPT = {
+    "en": "Please type the market name.",
+    "hi": "कृपया मंडी का नाम लिखें।",
+    "gu": "કૃપા કરીને માર્કેટનું નામ લખો."
+}
+COMMODITY_PROMPT = {
+    "en": "Please type commodity name.",
+    "hi": "कृपया फसल का नाम लिखें।",
+    "gu": "કૃપા કરીને પાકનું નામ લખો."
+}
+FALLBACK_REPLY = {
+    "en": "Start with: Punjab mandi / Rajasthan mandi / Gujarat mandi OR type: weather",
+    "hi": "शुरू करें: Punjab mandi / Rajasthan mandi / Gujarat mandi या 'weather' लिखें।",
+    "gu": "શરૂ કરો: Punjab mandi / Rajasthan mandi / Gujarat mandi અથવા 'weather' લખો."
+}
+STATIC_REPLIES = [LOCATION_PROMPT, MARKET_PROMPT, COMMODITY_PROMPT, FALLBACK_REPLY]
+
+def localized(replies, lang):
+    return replies.get(lang, replies["hi"])
+
+mandi_store = MandiStore(MANDI_DB_PATH)
 
 # -----------------------------------------------------
-# PIB NEWS (Scrape + RSS fallback)
-# -----------------------------------------------------
-# -----------------------------------------------------
-# PIB NEWS (Google RSS first → PIB scrape fallback)
+# PIB NEWS (Google RSS first → PIB scrape fallback, polled in background)
 # -----------------------------------------------------
 HEADERS = {
     "User-Agent": "Mozilla/5.0",
@@ -41,155 +88,121 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+news_feed = NewsFeed(
+    HEADERS,
+    max_items=NEWS_MAX_ITEMS,
+    interval_seconds=NEWS_REFRESH_INTERVAL,
+    retry_seconds=NEWS_RETRY_SECONDS,
+)
+
 @app.route("/pib-news", methods=["GET"])
 def pib_news():
     count = int(request.args.get("count", 10))
-    news_list = []
-
-    # ------------------------------
-    # 1️⃣ Google News RSS (Primary - Most Stable)
-    # ------------------------------
-    try:
-        rss_url = "https://news.google.com/rss/search?q=Department+Agriculture+Farmers+Welfare+India+government&hl=en-IN&gl=IN&ceid=IN:en"
-        rss_response = requests.get(rss_url, headers=HEADERS, timeout=10)
-
-        if rss_response.status_code == 200:
-            root = ET.fromstring(rss_response.content)
-
-            for item in root.findall(".//item")[:count]:
-                title = item.findtext("title", "")
-                link = item.findtext("link", "")
-                pub_date = item.findtext("pubDate", datetime.now().strftime("%a, %d %b %Y"))
-
-                if title:
-                    news_list.append({
-                        "title": title,
-                        "link": link,
-                        "published": pub_date
-                    })
-
-        # If RSS worked, return immediately
-        if news_list:
-            return jsonify({
-                "status": "success",
-                "source": "google-rss",
-                "total": len(news_list),
-                "news": news_list
-            })
-
-    except Exception as e:
-        print("Google RSS error:", e)
 
-    # ------------------------------
-    # 2️⃣ PIB Website Scrape (Fallback)
-    # ------------------------------
-    try:
-        url = "https://pib.gov.in/allRel.aspx"
-        response = requests.get(url, headers=HEADERS, timeout=15)
-
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            for item in soup.select("ul.release-list li, .all-release li")[:count]:
-                title_tag = item.find("a")
-                if not title_tag:
-                    continue
-
-                title = title_tag.get_text(strip=True)
-                link = title_tag.get("href", "")
-
-                if link and not link.startswith("http"):
-                    link = "https://pib.gov.in/" + link.lstrip("/")
-
-                if title:
-                    news_list.append({
-                        "title": title,
-                        "link": link,
-                        "published": datetime.now().strftime("%d %b %Y")
-                    })
-
-        if news_list:
-            return jsonify({
-                "status": "success",
-                "source": "pib-scrape",
-                "total": len(news_list),
-                "news": news_list
-            })
-
-    except Exception as e:
-        print("PIB scrape error:", e)
+    # Served from memory; only the very first request waits for a fetch
+    news_feed.ensure_loaded()
+    news_list, source, updated_at = news_feed.latest(count)
+
+    if news_list:
+        return jsonify({
+            "status": "success",
+            "source": source,
+            "total": len(news_list),
+            "news": news_list,
+            "as_of": as_of(updated_at)
+        })
 
-    # ------------------------------
-    # 3️⃣ Final fallback
-    # ------------------------------
     return jsonify({
         "status": "error",
         "message": "Could not fetch agriculture news at this time.",
         "news": []
     }), 503
+
+@app.errorhandler(MandiBusyError)
+def mandi_busy(e):
+    # A first fetch of this key is running in another worker; retrying shortly hits its snapshot
+    response = jsonify({
+        "error": str(e),
+        "text": "Mandi prices are still loading, please try again in a few seconds.",
+    })
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
 @app.route("/top-commodities", methods=["GET"])
 def top_commodities():
     state = request.args.get("state", "Punjab")
+    if state not in SUPPORTED_STATES:
+        return jsonify({"error": f"state must be one of {', '.join(SUPPORTED_STATES)}"}), 400
 
-    records = fetch_state_records(state)
-
-    if not records:
-        return jsonify({"data": []})
+    sort = request.args.get("sort", "mean")
+    market = request.args.get("market", "")
+    days = request.args.get("days", 0, type=int)
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
 
-    commodity_prices = {}
+    if sort not in SORTABLE_AGGREGATES:
+        return jsonify({"error": f"sort must be one of {', '.join(SORTABLE_AGGREGATES)}"}), 400
+    if days not in AGGREGATE_WINDOWS:
+        return jsonify({"error": f"days must be one of {', '.join(map(str, AGGREGATE_WINDOWS))}"}), 400
 
-    for r in records:
-        commodity = r.get("commodity")
-        modal = r.get("modal_price")
-
-        if not commodity or not modal:
-            continue
+    fetched_at = mandi_refresher.ensure_state(state)
+    if fetched_at is None:
+        return jsonify({"data": []})
 
-        try:
-            modal = float(modal)
-        except:
-            continue
+    # Precomputed aggregates: highest `sort` price first
+    result = [
+        {
+            "crop": row["commodity"],
+            "price": row[sort],
+            "unit": "₹/quintal",
+            "mean": row["mean"],
+            "median": row["median"],
+            "min": row["min"],
+            "max": row["max"],
+            "weighted_modal": row["weighted_modal"],
+            "samples": row["samples"],
+        }
+        for row in mandi_store.top_commodities(state, limit, sort, market, days)
+    ]
 
-        if commodity not in commodity_prices:
-            commodity_prices[commodity] = []
+    return jsonify({
+        "data": result,
+        "as_of": as_of(fetched_at),
+        "stale": time.time() - fetched_at >= CACHE_DURATION.total_seconds()
+    })
+# -----------------------------------------------------
+# FREE WEATHER (Open-Meteo) - NO API KEY
+# -----------------------------------------------------
+class WeatherUnavailable(Exception):
+    pass
 
-        commodity_prices[commodity].append(modal)
+def snap_to_grid(value, grid=WEATHER_GRID_DEG):
+    # Nearby farmers share one cache entry (0.1° ≈ 11 km)
+    return round(round(float(value) / grid) * grid, 4)
 
-    result = []
+async def fetch_current_weather(lat, lon):
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "current_weather": "true"
+    }
 
-    for commodity, prices in commodity_prices.items():
-        avg_price = round(sum(prices) / len(prices), 2)
+    r = await upstreams.get(OPEN_METEO_URL, params=params, timeout=10)
 
-        result.append({
-            "crop": commodity,
-            "price": avg_price,
-            "unit": "₹/quintal"
-        })
+    if r.status_code != 200:
+        raise WeatherUnavailable()
 
-    # Sort highest price first
-    result = sorted(result, key=lambda x: x["price"], reverse=True)
+    return r.json().get("current_weather", {})
 
-    # Top 10
-    return jsonify({"data": result[:10]})
-# -----------------------------------------------------
-# FREE WEATHER (Open-Meteo) - NO API KEY
-# -----------------------------------------------------
 def get_weather(lat, lon):
     try:
-        url = f"https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current_weather": True
-        }
-
-        r = requests.get(url, params=params, timeout=10)
-
-        if r.status_code != 200:
-            return "Weather service unavailable."
-
-        data = r.json()
-        current = data.get("current_weather", {})
+        key = (snap_to_grid(lat), snap_to_grid(lon))
+        # While Open-Meteo is failing (or its breaker is open) the last
+        # known reading for the grid cell is served instead of an error
+        current = WEATHER_CACHE.get_or_load(
+            key,
+            lambda: upstreams.run(fetch_current_weather(*key), timeout=15),
+            stale_on_error=True
+        )
 
         temp = current.get("temperature")
         wind = current.get("windspeed")
@@ -209,165 +222,244 @@ Wind Speed: {wind} km/h
 🌾 Advisory:
 {advisory}
 """
+    except WeatherUnavailable:
+        return "Weather service unavailable."
     except Exception as e:
         return f"Weather Error: {str(e)}"
-@lru_cache(maxsize=50)
-def fetch_state_records(state):
+# Pages through the full data.gov.in resource into the store
+mandi_ingestor = MandiIngestor(
+    mandi_store,
+    DATA_GOV_BASE_URL,
+    DATA_GOV_API_KEY,
+    MANDI_RESOURCE_ID,
+    page_size=MANDI_PAGE_SIZE,
+    max_workers=MANDI_SYNC_WORKERS,
+)
+
+# Market/commodity lookup for /chat, rebuilt whenever a state snapshot changes
+mandi_entities = MandiEntityIndexes(mandi_store)
+
+def load_mandi_records(state, market=""):
+    print(f"Fetching fresh mandi data for {state} {market}".rstrip())
+    try:
+        loaded = mandi_ingestor.sync(state, market) is not None
+    except Exception as e:
+        print("Data.gov sync error:", e)
+        return False
 
-    # 1️⃣ Check local cache first
-    if os.path.exists(CACHE_FILE):
-        try:
-            with open(CACHE_FILE, "r") as f:
-                cache_data = json.load(f)
+    if loaded and not market:
+        mandi_entities.rebuild(state)
+    return loaded
 
-            state_cache = cache_data.get(state)
 
-            if state_cache:
-                last_updated = datetime.fromisoformat(state_cache["timestamp"])
+# Serves the last good snapshot immediately and refreshes in the background
+mandi_refresher = MandiRefresher(
+    mandi_store,
+    load_mandi_records,
+    SUPPORTED_STATES,
+    ttl_seconds=CACHE_DURATION.total_seconds(),
+    interval_seconds=MANDI_REFRESH_INTERVAL,
+)
 
-                if datetime.utcnow() - last_updated < CACHE_DURATION:
-                    print(f"Serving {state} from local cache")
-                    return state_cache["data"]
+def as_of(fetched_at):
+    if fetched_at is None:
+        return None
+    return datetime.utcfromtimestamp(fetched_at).isoformat() + "Z"
 
-        except Exception as e:
-            print("Cache read error:", e)
+def fetch_state_records(state):
+    records, _ = mandi_refresher.state_snapshot(state)
+    return records
 
-    # 2️⃣ If cache expired → Fetch fresh
-    print(f"Fetching fresh mandi data for {state}")
+def fetch_market_records(state, market):
+    records, _ = mandi_refresher.market_snapshot(state, market)
+    return records
 
-    url = f"https://api.data.gov.in/resource/{MANDI_RESOURCE_ID}"
+def detect_state(tokens):
+    return STATE_INDEX.match(tokens)
 
-    params = {
-        "api-key": DATA_GOV_API_KEY,
-        "format": "json",
-        "limit": 300,
-        "filters[state]": state
-    }
+def get_markets(state):
+    return mandi_store.markets(state)
 
-    try:
-        r = requests.get(url, params=params, timeout=10)
+def get_commodities(state, market):
+    return mandi_store.commodities(state, market)
 
-        if r.status_code != 200:
-            print("Data.gov error:", r.status_code)
-            return []
 
-        records = r.json().get("records", [])
+# -----------------------------------------------------
+# ROUTES
+# -----------------------------------------------------
+@app.route("/")
+def home():
+    return "Main Backend Running (Chat + Mandi + Weather + PIB)"
 
-        # 3️⃣ Save to cache
-        cache_data = {}
+@app.route("/health")
+def health():
+    return jsonify({
+        "status": "OK",
+        "weather_cache": WEATHER_CACHE.stats(),
+        "upstreams": upstreams.stats(),
+        "sessions": session_store.stats(),
+        "answer_cache": answer_cache.stats(),
+        "audio_cache": get_audio_cache().stats()
+    })
+
+def request_json():
+    """The JSON body when it is an object; {} for anything else."""
+    body = request.get_json(silent=True)
+    return body if isinstance(body, dict) else {}
+
+def request_session_token():
+    token = (
+        request.headers.get("X-Session-Token")
+        or request.cookies.get(SESSION_COOKIE)
+        or request.form.get("session_token")
+        or request_json().get("session_token")
+    )
+    return token if valid_session_token(token) else None
+
+def load_session():
+    """(token, context) for the caller; unknown or expired tokens start fresh."""
+    token = request_session_token()
+    context = session_store.get(token) if token else None
+    if context is None:
+        return token or new_session_token(), SessionContext()
+    return token, context
+
+def session_reply(token, context, payload, status=200):
+    session_store.put(token, context)
+
+    payload["session_token"] = token
+    response = jsonify(payload)
+    response.set_cookie(SESSION_COOKIE, token, max_age=session_store.ttl, httponly=True, samesite="Lax")
+    return response, status
 
-        if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, "r") as f:
-                cache_data = json.load(f)
+@app.route("/reset", methods=["POST"])
+def reset():
+    token, context = load_session()
+    context.reset()
+    return session_reply(token, context, {"text": "Context reset."})
+
+# Languages the voice routes speak; /chat falls back to Hindi for others
+VOICE_LANGS = ("hi", "gu", "en")
+
+def request_lang():
+    lang = request.form.get("lang") or request_json().get("lang")
+    return lang if isinstance(lang, str) and lang else "hi"
+
+@app.route("/voice", methods=["POST"])
+def voice():
+    """
+    Spoken answer as a chunked audio stream: each sentence is sent as soon
+    as it is synthesized while the LLM is still writing the rest.
+    Accepts an "audio" upload (transcribed first) or "text". Answers are
+    cached per language, so repeated and near-identical questions skip the LLM.
+    """
+    lang = request_lang()
+    question = request.form.get("text") or request_json().get("text")
+
+    # Checked before the 200 and the stream start; a bad lang would only fail mid-stream
+    if lang not in VOICE_LANGS:
+        return jsonify({"text": f"lang must be one of {', '.join(VOICE_LANGS)}"}), 400
+
+    pipeline = get_voice_pipeline()
+    audio = request.files.get("audio")
+    if audio:
+        question = pipeline.transcribe(audio.stream, audio.filename or "voice.webm")
+
+    if not isinstance(question, str) or not question.strip():
+        return jsonify({"text": "No query provided"}), 400
 
-        cache_data[state] = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "data": records
-        }
+    question = question.strip()
+    cached = answer_cache.get(question, lang)
 
-        with open(CACHE_FILE, "w") as f:
-            json.dump(cache_data, f)
+    def generate():
+        if cached is not None:
+            for _, chunk in pipeline.speak(cached, lang):
+                yield chunk
+            return
 
-        print(f"Stored {state} data in cache")
+        # Only a fully streamed answer is cached
+        tokens = []
+        for _, chunk in pipeline.run(build_messages(question), lang, on_text=tokens.append):
+            yield chunk
+        answer_cache.put(question, lang, "".join(tokens))
 
-        return records
+    return Response(stream_with_context(generate()), mimetype=pipeline.tts.mimetype)
 
-    except Exception as e:
-        print("API error:", e)
-        return []
-@lru_cache(maxsize=200)
-def fetch_market_records(state, market):
-    url = f"https://api.data.gov.in/resource/{MANDI_RESOURCE_ID}"
-    params = {
-        "api-key": DATA_GOV_API_KEY,
-        "format": "json",
-        "limit": 500,
-        "filters[state]": state,
-        "filters[market]": market
-    }
-    try:
-        r = requests.get(url, params=params, timeout=15)
-        if r.status_code == 200:
-            return r.json().get("records", [])
-    except Exception as e:
-        print("Market API Error:", e)
-    return []
+@app.route("/speak", methods=["POST"])
+def speak():
+    """
+    Reads a /chat reply aloud, sentence by sentence. Each line or sentence
+    is synthesized once and then served from the audio cache, so the fixed
+    prompts at the end of most replies cost nothing after startup.
+    """
+    lang = request_lang()
+    text = request.form.get("text") or request_json().get("text")
 
-def detect_state(text):
-    for state in SUPPORTED_STATES:
-        if state.lower() in text.lower():
-            return state
-    return None
+    if not isinstance(text, str) or not text.strip():
+        return jsonify({"text": "No text provided"}), 400
 
-def get_markets(records):
-    return sorted(set(r.get("market") for r in records if r.get("market")))
+    if lang not in VOICE_LANGS:
+        return jsonify({"text": f"lang must be one of {', '.join(VOICE_LANGS)}"}), 400
 
-def get_commodities(records):
-    return sorted(set(r.get("commodity") for r in records if r.get("commodity")))
+    pipeline = get_voice_pipeline()
 
+    def generate():
+        for _, chunk in pipeline.speak(text.strip(), lang):
+            yield chunk
 
-# -----------------------------------------------------
-# ROUTES
-# -----------------------------------------------------
-@app.route("/")
-def home():
-    return "Main Backend Running (Chat + Mandi + Weather + PIB)"
+    return Response(stream_with_context(generate()), mimetype=pipeline.tts.mimetype)
 
-@app.route("/reset", methods=["POST"])
-def reset():
-    user_ip = request.remote_addr
-    USER_CONTEXT[user_ip] = {"state": None, "market": None}
-    return jsonify({"text": "Context reset."})
+def prerender_static_replies():
+    try:
+        tts = get_voice_pipeline().tts
+        for replies in STATIC_REPLIES:
+            for lang, text in replies.items():
+                tts.synthesize(text, lang)
+    except Exception as e:
+        print("Voice prerender error:", e)
 
 @app.route("/chat", methods=["POST"])
 def chat():
-    question = request.form.get("text") or (request.json.get("text") if request.is_json else None)
-    lang = request.form.get("lang") or (request.json.get("lang") if request.is_json else "hi")
+    question = request.form.get("text") or request_json().get("text")
+    lang = request_lang()
 
-    if not question:
+    if not question or not isinstance(question, str):
         return jsonify({"text": "No query provided"}), 400
 
     q = question.strip()
-    user_ip = request.remote_addr
-
-    if user_ip not in USER_CONTEXT:
-        USER_CONTEXT[user_ip] = {"state": None, "market": None}
-    context = USER_CONTEXT[user_ip]
+    q_lower = q.lower()
+    tokens = tokenize(q)
+    token, context = load_session()
 
     # -----------------------------
     # 🌦 WEATHER
     # -----------------------------
-    if ("weather" in q.lower()) or ("मौसम" in q) or ("mausam" in q.lower()) or ("હવામાન" in q):
-        lat = request.form.get("lat") or (request.json.get("lat") if request.is_json else None)
-        lon = request.form.get("lon") or (request.json.get("lon") if request.is_json else None)
+    if ("weather" in q_lower) or ("मौसम" in q) or ("mausam" in q_lower) or ("હવામાન" in q):
+        lat = request.form.get("lat") or request_json().get("lat")
+        lon = request.form.get("lon") or request_json().get("lon")
 
         if not lat or not lon:
-            msg = {
-                "en": "Please allow location access to fetch weather.",
-                "hi": "मौसम जानने के लिए कृपया लोकेशन की अनुमति दें।",
-                "gu": "હવામાન જાણવા માટે કૃપા કરીને લોકેશન પરવાનગી આપો."
-            }
-            return jsonify({"text": msg.get(lang, msg["hi"])})
+            return session_reply(token, context, {"text": localized(LOCATION_PROMPT, lang)})
 
         weather_text = get_weather(lat, lon)
 
-        return jsonify({"text": weather_text})
+        return session_reply(token, context, {"text": weather_text})
 
     # -----------------------------
     # 🏛 STATE DETECTION
     # -----------------------------
-    state = detect_state(q)
+    state = detect_state(tokens)
     if state:
-        context["state"] = state
-        context["market"] = None
+        context.state = state
+        context.market = None
 
-        records = fetch_state_records(state)
-        if not records:
-            return jsonify({"text": f"No mandi data found for {state}."})
+        fetched_at = mandi_refresher.ensure_state(state)
+        if fetched_at is None:
+            return session_reply(token, context, {"text": f"No mandi data found for {state}."})
 
-        markets = get_markets(records)
+        markets = get_markets(state)
         if not markets:
-            return jsonify({"text": f"No markets found for {state}."})
+            return session_reply(token, context, {"text": f"No markets found for {state}."})
 
         if lang == "gu":
             msg = f"{state} માં ટોચની મંડીઓ:\n\n"
@@ -379,80 +471,75 @@ def chat():
         for i, m in enumerate(markets[:15], 1):
             msg += f"{i}. {m}\n"
 
-        if lang == "gu":
-            msg += "\nકૃપા કરીને માર્કેટનું નામ લખો."
-        elif lang == "en":
-            msg += "\nPlease type the market name."
-        else:
-            msg += "\nकृपया मंडी का नाम लिखें।"
+        msg += "\n" + localized(MARKET_PROMPT, lang)
 
-        return jsonify({"text": msg})
+        return session_reply(token, context, {"text": msg, "as_of": as_of(fetched_at)})
 
     # -----------------------------
     # 🏬 MARKET DETECTION
     # -----------------------------
-    if context["state"]:
-        state = context["state"]
-        state_records = fetch_state_records(state)
-        markets = get_markets(state_records)
-
-        for market in markets:
-            if market.lower() in q.lower():
-                context["market"] = market
-                market_records = fetch_market_records(state, market)
-                commodities = get_commodities(market_records)
-
-                if not commodities:
-                    return jsonify({"text": f"No commodities found in {market}."})
-
-                if lang == "gu":
-                    msg = f"{market} માં ઉપલબ્ધ પાકો:\n\n"
-                elif lang == "en":
-                    msg = f"Available commodities in {market}:\n\n"
-                else:
-                    msg = f"{market} में उपलब्ध फसलें:\n\n"
-
-                for c in commodities:
-                    msg += f"- {c}\n"
-
-                if lang == "gu":
-                    msg += "\nકૃપા કરીને પાકનું નામ લખો."
-                elif lang == "en":
-                    msg += "\nPlease type commodity name."
-                else:
-                    msg += "\nकृपया फसल का नाम लिखें।"
-
-                return jsonify({"text": msg})
+    if context.state:
+        state = context.state
+        mandi_refresher.ensure_state(state)
+        market = mandi_entities.get(state).markets.match(tokens)
+
+        if market:
+            context.market = market
+            fetched_at = mandi_refresher.ensure_market(state, market)
+            commodities = get_commodities(state, market)
+
+            if not commodities:
+                return session_reply(token, context, {"text": f"No commodities found in {market}."})
+
+            if lang == "gu":
+                msg = f"{market} માં ઉપલબ્ધ પાકો:\n\n"
+            elif lang == "en":
+                msg = f"Available commodities in {market}:\n\n"
+            else:
+                msg = f"{market} में उपलब्ध फसलें:\n\n"
+
+            for c in commodities:
+                msg += f"- {c}\n"
+
+            msg += "\n" + localized(COMMODITY_PROMPT, lang)
+
+            return session_reply(token, context, {"text": msg, "as_of": as_of(fetched_at)})
 
     # -----------------------------
     # 🌾 COMMODITY PRICE
     # -----------------------------
-    if context["state"] and context["market"]:
-        state = context["state"]
-        market = context["market"]
-        market_records = fetch_market_records(state, market)
-
-        for r in market_records:
-            commodity = (r.get("commodity") or "").strip()
-            if commodity and commodity.lower() in q.lower():
-                if lang == "gu":
-                    msg = f"""📊 {commodity} નો ભાવ ({market}, {state}):
+    if context.state and context.market:
+        state = context.state
+        market = context.market
+        commodity = mandi_entities.get(state).commodities.match(tokens)
+        market_records, fetched_at = mandi_refresher.market_snapshot(state, market)
+
+        r = None
+        if commodity:
+            r = next(
+                (r for r in market_records if (r.get("commodity") or "").strip() == commodity),
+                None
+            )
+
+        if r:
+            if lang == "gu":
+                msg = f"""📊 {commodity} નો ભાવ ({market}, {state}):
 
 ન્યૂનતમ ભાવ: ₹{r.get('min_price')}
 મહત્તમ ભાવ: ₹{r.get('max_price')}
 મોડલ ભાવ: ₹{r.get('modal_price')}
 તારીખ: {r.get('arrival_date')}
 """
-                elif lang == "en":
-                    msg = f"""📊 Price breakdown for {commodity} in {market} ({state}):
+            elif lang == "en":
+                msg = f"""📊 Price breakdown for {commodity} in {market} ({state}):
 
 Minimum Price: ₹{r.get('min_price')}
 Maximum Price: ₹{r.get('max_price')}
 Modal Price: ₹{r.get('modal_price')}
 Arrival Date: {r.get('arrival_date')}
 """
-                else:
-                    msg = f"""📊 {commodity} का भाव ({market}, {state}):
+            else:
+                msg = f"""📊 {commodity} का भाव ({market}, {state}):
 
 न्यूनतम मूल्य: ₹{r.get('min_price')}
 अधिकतम मूल्य: ₹{r.get('max_price')}
@@ -460,18 +547,27 @@ Arrival Date: {r.get('arrival_date')}
 तारीख: {r.get('arrival_date')}
 """
 
-                return jsonify({"text": msg})
+            return session_reply(token, context, {"text": msg, "as_of": as_of(fetched_at)})
 
     # -----------------------------
     # 🔁 FALLBACK
     # -----------------------------
-    fallback = {
-        "en": "Start with: Punjab mandi / Rajasthan mandi / Gujarat mandi OR type: weather",
-        "hi": "शुरू करें: Punjab mandi / Rajasthan mandi / Gujarat mandi या 'weather' लिखें।",
-        "gu": "શરૂ કરો: Punjab mandi / Rajasthan mandi / Gujarat mandi અથવા 'weather' લખો."
-    }
+    return session_reply(token, context, {"text": localized(FALLBACK_REPLY, lang)})
+
+def start_background_tasks():
+    """
+    Pollers and warm-up that hit the network. Called once per serving
+    process (__main__ or gunicorn post_fork), never at import, so the
+    gunicorn master and test imports start no threads.
+    """
+    if NEWS_PREFETCH:
+        news_feed.start()
+    if MANDI_PREFETCH:
+        mandi_refresher.start()
+    if VOICE_PRERENDER:
+        threading.Thread(target=prerender_static_replies, name="voice-prerender", daemon=True).start()
 
-    return jsonify({"text": fallback.get(lang, fallback["hi"])})
 if __name__ == "__main__":
+    start_background_tasks()
     port = int(os.environ.get("PORT", 5001))
     app.run(host="0.0.0.0", port=port)
\ No newline at end of file
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from ttl_cache import SingleFlight
+
+
+def audio_key(text, lang, voice):
+    payload = "\0".join((voice, lang, text.strip()))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Content-addressed store of synthesized speech, one file per
+    (text, lang, voice) under `directory`, bounded to `max_bytes` with LRU
+    eviction. Concurrent requests for the same audio are coalesced into one
+    synthesis.
+
+    Recency is kept in memory and mirrored to file mtimes, so a restart
+    picks the LRU order back up from disk. Several workers may share the
+    directory; a file another worker evicted just reads as a miss.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, suffix=".mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._sizes = OrderedDict()  # key -> bytes, least recent first
+        self._total = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            files.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+
+        for _, key, size in sorted(files):
+            self._sizes[key] = size
+            self._total += size
+        self._evict()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._sizes) > 1:
+            key, size = self._sizes.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+    def _read(self, key):
+        try:
+            with open(self.path(key), "rb") as f:
+                audio = f.read()
+            os.utime(self.path(key))
+        except OSError:
+            with self._lock:
+                self._total -= self._sizes.pop(key, 0)
+            return None
+
+        with self._lock:
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+        return audio
+
+    def _write(self, key, audio):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self._total += len(audio) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(audio)
+            self._evict()
+
+    def get_or_synthesize(self, text, lang, voice, synthesize):
+        """Cached audio for the text, else synthesize(text, lang) stored once."""
+        key = audio_key(text, lang, voice)
+
+        with self._lock:
+            known = key in self._sizes
+        audio = self._read(key) if known else None
+        if audio is not None:
+            with self._lock:
+                self.hits += 1
+            return audio
+
+        with self._lock:
+            self.misses += 1
+
+        def load():
+            # Another worker process may have written it meanwhile
+            if os.path.exists(self.path(key)):
+                cached = self._read(key)
+                if cached is not None:
+                    with self._lock:
+                        if key not in self._sizes:
+                            self._sizes[key] = len(cached)
+                            self._total += len(cached)
+                    return cached
+
+            audio = synthesize(text, lang)
+            self._write(key, audio)
+            return audio
+
+        return self._flight.do(key, load)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "files": len(self._sizes),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self._flight.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """Process-wide cache in AUDIO_CACHE_DIR, capped at AUDIO_CACHE_MAX_MB."""
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache(
+                os.getenv("AUDIO_CACHE_DIR", "audio_cache"),
+                max_bytes=int(float(os.getenv("AUDIO_CACHE_MAX_MB", 200)) * 1024 * 1024),
+            )
+        return _audio_cache
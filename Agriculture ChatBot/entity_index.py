@@ -0,0 +1,355 @@
+import re
+import threading
+import unicodedata
+
+TOKEN_SPLIT = re.compile(r"[\s.,;:!?()\[\]{}\"'/\\|+&\-।॥]+")
+
+STATE_ALIASES = {
+    "Punjab": ["panjab", "पंजाब", "પંજાબ"],
+    "Rajasthan": ["rajsthan", "राजस्थान", "રાજસ્થાન"],
+    "Gujarat": ["gujrat", "गुजरात", "ગુજરાત"],
+}
+
+# Keyed by the lowercase commodity name before any "(...)" qualifier, as
+# data.gov.in spells it: "Paddy(Dhan)(Common)" -> "paddy".
+COMMODITY_ALIASES = {
+    "wheat": ["gehun", "gehu", "gehoon", "गेहूं", "गेहूँ", "ઘઉં"],
+    "rice": ["chawal", "chaval", "चावल", "ચોખા"],
+    "paddy": ["dhan", "धान", "ડાંગર"],
+    "cotton": ["kapas", "कपास", "કપાસ"],
+    "apple": ["seb", "सेब", "સફરજન"],
+    "onion": ["pyaz", "pyaaz", "kanda", "प्याज", "ડુંગળી"],
+    "potato": ["aloo", "alu", "आलू", "બટાકા", "બટાટા"],
+    "tomato": ["tamatar", "टमाटर", "ટામેટા", "ટમેટા"],
+    "maize": ["makka", "makki", "मक्का", "મકાઈ"],
+    "bajra": ["bajri", "बाजरा", "બાજરી"],
+    "jowar": ["jwar", "ज्वार", "જુવાર"],
+    "mustard": ["sarson", "सरसों", "રાઈ"],
+    "groundnut": ["mungfali", "moongfali", "मूंगफली", "મગફળી"],
+    "bengal gram": ["chana", "चना", "ચણા"],
+    "soyabean": ["soybean", "soya", "सोयाबीन", "સોયાબીન"],
+    "cumin seed": ["jeera", "jira", "जीरा", "જીરું"],
+    "castor seed": ["arandi", "अरंडी", "એરંડા"],
+    "garlic": ["lahsun", "lehsun", "लहसुन", "લસણ"],
+    "cauliflower": ["gobhi", "phool gobhi", "फूलगोभी", "ફૂલકોબી"],
+    "cabbage": ["patta gobhi", "पत्तागोभी", "કોબી"],
+    "brinjal": ["baingan", "बैंगन", "રીંગણ"],
+    "banana": ["kela", "केला", "કેળા"],
+    "green chilli": ["hari mirch", "हरी मिर्च", "લીલા મરચાં"],
+    "sugarcane": ["ganna", "गन्ना", "શેરડી"],
+}
+
+# Devanagari consonants U+0915..U+0939 in code point order, reduced to a
+# rough Latin consonant skeleton. The Gujarati block mirrors Devanagari at
+# a fixed 0x180 offset, so the same table covers both scripts.
+INDIC_CONSONANTS = "kkggnccjjnttddnttddnnpfbbmyrrlllwsssh"
+INDIC_NUKTA_CONSONANTS = "kkgjddfy"  # U+0958..U+095F
+INDIC_NASALS = {"ँ", "ं"}  # candrabindu, anusvara
+GUJARATI_OFFSET = 0x180
+
+LATIN_DIGRAPHS = (
+    ("ch", "\x01"), ("sh", "s"), ("kh", "k"), ("gh", "g"), ("jh", "j"),
+    ("th", "t"), ("dh", "d"), ("ph", "f"), ("bh", "b"), ("ck", "k"),
+    ("c", "k"), ("q", "k"), ("x", "ks"), ("z", "j"), ("v", "w"), ("\x01", "c"),
+)
+VOWELS = re.compile(r"[aeiou]")
+REPEATS = re.compile(r"(.)\1+")
+
+MIN_PHONETIC_KEY = 3
+
+# Tokens this short are only ever matched exactly: at four letters one edit
+# already turns "what" into "wheat" and "koti" into "kota".
+MIN_FUZZY_LENGTH = 5
+
+# Everyday query words that sit one edit away from an entity name
+# ("union" -> Onion). They are matched exactly or not at all.
+COMMON_WORDS = {
+    "about", "after", "again", "arrival", "arrivals", "before", "below",
+    "could", "crops", "every", "float", "goods", "grade", "labour", "latest",
+    "lower", "mandi", "mandis", "market", "markets", "modal", "other",
+    "place", "please", "price", "prices", "quintal", "rates", "seeds",
+    "shall", "should", "state", "tell", "there", "these", "those", "today",
+    "union", "value", "weather", "where", "which", "while", "would",
+    "bataiye", "bataye", "batao", "kitna", "kitne", "kitni", "kaise",
+    "kahan", "kyaa",
+    "क्या", "कितना", "कितने", "बताओ", "बताइए", "भाव", "कीमत", "मंडी", "आज",
+    "શું", "કેટલો", "કેટલા", "ભાવ", "કિંમત", "માર્કેટ", "આજે",
+}
+
+
+def normalize(text):
+    return unicodedata.normalize("NFC", text).lower()
+
+
+def tokenize(text):
+    return [token for token in TOKEN_SPLIT.split(normalize(text)) if token]
+
+
+def max_edits(token):
+    """Spelling errors tolerated for a token of this length."""
+    if len(token) < 4:
+        return 0
+    if len(token) < 8:
+        return 1
+    return 2
+
+
+def stem(token):
+    """
+    Drops a Latin plural ending: "tomatoes" -> "tomato". A final y/ies is
+    folded to i, so "chilli", "chilly" and "chillies" share a stem.
+    """
+    if len(token) <= 3 or not token.isascii():
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "i"
+    if token.endswith("y"):
+        return token[:-1] + "i"
+    if token.endswith(("oes", "ses", "xes", "zes", "ches", "shes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def fuzzy_allowed(token):
+    return len(token) >= MIN_FUZZY_LENGTH and token not in COMMON_WORDS
+
+
+def deletions(token, distance):
+    """Every string reachable from `token` by deleting up to `distance` characters."""
+    results = {token}
+    frontier = {token}
+    for _ in range(distance):
+        frontier = {
+            word[:i] + word[i + 1:]
+            for word in frontier
+            for i in range(len(word))
+        }
+        results |= frontier
+    return results
+
+
+def edit_distance(a, b):
+    """Levenshtein distance with adjacent transpositions."""
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def phonetic_key(token):
+    """
+    Consonant skeleton of a Latin, Devanagari or Gujarati token, so that
+    "राजकोट", "રાજકોટ" and "Rajkot" all reduce to "rjkt".
+    """
+    letters = []
+    for ch in token:
+        code = ord(ch)
+        if 0x0A80 <= code <= 0x0AFF:
+            code -= GUJARATI_OFFSET
+            ch = chr(code)
+        if 0x0915 <= code <= 0x0939:
+            letters.append(INDIC_CONSONANTS[code - 0x0915])
+        elif 0x0958 <= code <= 0x095F:
+            letters.append(INDIC_NUKTA_CONSONANTS[code - 0x0958])
+        elif ch in INDIC_NASALS:
+            letters.append("n")
+        elif "a" <= ch <= "z":
+            letters.append(ch)
+
+    key = "".join(letters)
+    if key.isascii() and any(ord(c) > 0x7F for c in token):
+        # Indic input is already a consonant skeleton
+        return REPEATS.sub(r"\1", key)
+
+    for digraph, replacement in LATIN_DIGRAPHS:
+        key = key.replace(digraph, replacement)
+    return REPEATS.sub(r"\1", VOWELS.sub("", key))
+
+
+class EntityIndex:
+    """
+    Token trie over entity names and their aliases.
+
+    match() walks the query once, trying the trie from every token
+    position, so its cost depends on the query length rather than on how
+    many entities are indexed. A query token that is not in the
+    vocabulary is tried as a plural of a vocabulary word first, then
+    corrected through a symmetric-deletion index (small spelling errors)
+    and a phonetic skeleton index (Hindi/Gujarati spellings of Latin
+    names). Corrections are only attempted for tokens of MIN_FUZZY_LENGTH
+    or more that are not COMMON_WORDS, and only an unambiguous closest
+    word is accepted.
+    """
+
+    END = ""
+
+    def __init__(self, entries):
+        """entries: iterable of (name, [phrase, ...]); earlier phrases win."""
+        self._trie = {}
+        self._vocabulary = set()
+        self._stems = {}
+        self._deletes = {}
+        self._phonetic = {}
+        self.size = 0
+
+        for name, phrases in entries:
+            self.size += 1
+            for phrase in phrases:
+                self._insert(tokenize(phrase), name)
+
+        for word in self._vocabulary:
+            self._stems.setdefault(stem(word), set()).add(word)
+            for variant in deletions(word, max_edits(word)):
+                self._deletes.setdefault(variant, set()).add(word)
+            key = phonetic_key(word)
+            if len(key) >= MIN_PHONETIC_KEY:
+                self._phonetic.setdefault(key, set()).add(word)
+
+        self._corrections = {}
+
+    def _insert(self, tokens, name):
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            self._vocabulary.add(token)
+            node = node.setdefault(token, {})
+        node.setdefault(self.END, name)
+
+    def _candidates(self, token):
+        """[(vocabulary word, edits)] that a query token may stand for."""
+        if token in self._vocabulary:
+            return [(token, 0)]
+
+        cached = self._corrections.get(token)
+        if cached is not None:
+            return cached
+
+        candidates = self._correct(token)
+        if len(self._corrections) < 10000:
+            self._corrections[token] = candidates
+        return candidates
+
+    def _correct(self, token):
+        # Singular/plural of a vocabulary word counts as exact
+        plurals = self._stems.get(stem(token))
+        if plurals:
+            return [(word, 0) for word in sorted(plurals)]
+
+        if not fuzzy_allowed(token):
+            return []
+
+        found = {}
+        for variant in deletions(token, max_edits(token)):
+            for word in self._deletes.get(variant, ()):
+                if word in found:
+                    continue
+                distance = edit_distance(token, word)
+                if 0 < distance <= max_edits(word):
+                    found[word] = distance
+
+        if found:
+            closest = min(found.values())
+            words = [word for word, distance in found.items() if distance == closest]
+            # Two words equally close: a guess either way, so no match
+            return [(words[0], closest)] if len(words) == 1 else []
+
+        key = phonetic_key(token)
+        words = self._phonetic.get(key, ())
+        if len(key) >= MIN_PHONETIC_KEY and len(words) == 1:
+            return [(next(iter(words)), 1)]
+        return []
+
+    def find(self, tokens):
+        """
+        Best match in a tokenized query as (name, start, end, edits):
+        longest span first, then fewest corrections, then earliest.
+        """
+        candidates = [self._candidates(token) for token in tokens]
+        best = None
+
+        for start in range(len(tokens)):
+            frontier = [(self._trie, 0)]
+            position = start
+            while frontier and position < len(tokens):
+                next_frontier = []
+                for node, edits in frontier:
+                    for word, distance in candidates[position]:
+                        child = node.get(word)
+                        if child is None:
+                            continue
+                        next_frontier.append((child, edits + distance))
+                        name = child.get(self.END)
+                        if name is not None:
+                            rank = (position + 1 - start, -(edits + distance), -start)
+                            if best is None or rank > best[0]:
+                                best = (rank, (name, start, position + 1, edits + distance))
+                frontier = next_frontier
+                position += 1
+
+        return best[1] if best else None
+
+    def match(self, tokens):
+        found = self.find(tokens)
+        return found[0] if found else None
+
+
+def commodity_phrases(name):
+    base = name.split("(")[0].strip()
+    return [name, base] + COMMODITY_ALIASES.get(base.lower(), [])
+
+
+def market_phrases(name):
+    return [name, name.split("(")[0].strip()]
+
+
+STATE_INDEX = EntityIndex(
+    (state, [state] + aliases) for state, aliases in STATE_ALIASES.items()
+)
+
+
+class MandiEntities:
+    """Market and commodity indexes of one state snapshot."""
+
+    def __init__(self, markets, commodities):
+        self.markets = EntityIndex((m, market_phrases(m)) for m in markets)
+        self.commodities = EntityIndex((c, commodity_phrases(c)) for c in commodities)
+
+
+class MandiEntityIndexes:
+    """
+    Per-state MandiEntities, rebuilt only when the state's snapshot changes
+    (the store's fetched_at moves), never per request.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, state):
+        fetched_at = self.store.snapshot_time(state)
+        entities = MandiEntities(
+            self.store.markets(state),
+            self.store.commodities(state),
+        )
+        with self._lock:
+            self._indexes[state] = (fetched_at, entities)
+        return entities
+
+    def get(self, state):
+        fetched_at = self.store.snapshot_time(state)
+        with self._lock:
+            cached = self._indexes.get(state)
+        if cached is not None and cached[0] == fetched_at:
+            return cached[1]
+        return self.rebuild(state)
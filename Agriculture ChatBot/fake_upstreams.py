@@ -0,0 +1,184 @@
+"""
+Local stand-ins for the chatbot's upstream APIs, for development and tests.
+
+    python fake_upstreams.py --port 8898
+    DATA_GOV_BASE_URL=http://127.0.0.1:8898 \
+    OPEN_METEO_URL=http://127.0.0.1:8898/v1/forecast \
+    NEWS_RSS_URL=http://127.0.0.1:8898/rss \
+    PIB_URL=http://127.0.0.1:8898/pib python app.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+MARKETS = {
+    "Punjab": ["Amritsar", "Bathinda", "Jalandhar", "Khanna", "Ludhiana"],
+    "Rajasthan": ["Bikaner", "Jaipur", "Kota", "Udaipur"],
+    "Gujarat": ["Ahmedabad", "Gondal", "Rajkot", "Surat", "Unjha"],
+}
+COMMODITIES = ["Wheat", "Paddy(Dhan)(Common)", "Cotton", "Mustard", "Onion", "Potato", "Tomato", "Bajra(Pearl Millet/Cumbu)"]
+
+
+def make_records(days=30, seed=7):
+    rng = random.Random(seed)
+    records = []
+    for state, markets in MARKETS.items():
+        for market in markets:
+            for commodity in COMMODITIES:
+                for day in range(1, days + 1):
+                    modal = rng.randint(1500, 6000)
+                    records.append({
+                        "state": state,
+                        "district": market,
+                        "market": market,
+                        "commodity": commodity,
+                        "variety": "Other",
+                        "grade": "FAQ",
+                        "arrival_date": f"{day:02d}/01/2025",
+                        "min_price": str(modal - rng.randint(50, 300)),
+                        "max_price": str(modal + rng.randint(50, 300)),
+                        "modal_price": str(modal),
+                    })
+    return records
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    records = []
+    latency = 0.0
+    fail_every = 0
+    requests_seen = 0
+    lock = threading.Lock()
+
+    def _send_json(self, payload, status=200):
+        self._send(json.dumps(payload).encode("utf-8"), "application/json", status)
+
+    def _send(self, body, content_type, status=200, etag=None):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests_seen += 1
+            count = cls.requests_seen
+
+        if cls.latency:
+            time.sleep(cls.latency)
+
+        if cls.fail_every and count % cls.fail_every == 0:
+            self._send_json({"error": "injected failure"}, status=503)
+            return
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path.startswith("/resource/"):
+            self._resource(query)
+        elif url.path == "/v1/forecast":
+            self._forecast(query)
+        elif url.path == "/rss":
+            self._rss()
+        elif url.path == "/pib":
+            self._pib()
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _resource(self, query):
+        rows = self.records
+        for key, value in query.items():
+            if key.startswith("filters[") and key.endswith("]"):
+                field = key[len("filters["):-1]
+                rows = [r for r in rows if r.get(field) == value]
+
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("limit", 10))
+        page = rows[offset:offset + limit]
+
+        self._send_json({
+            "total": len(rows),
+            "count": len(page),
+            "offset": offset,
+            "limit": limit,
+            "records": page,
+        })
+
+    def _forecast(self, query):
+        # Deterministic per coordinate so cached and fresh answers match
+        lat = float(query.get("latitude", 0))
+        lon = float(query.get("longitude", 0))
+        self._send_json({
+            "latitude": lat,
+            "longitude": lon,
+            "current_weather": {
+                "temperature": round(20 + (abs(lat) % 20), 1),
+                "windspeed": round(abs(lon) % 30, 1),
+                "time": time.strftime("%Y-%m-%dT%H:%M"),
+            },
+        })
+
+    def _rss(self):
+        items = "".join(
+            f"<item><title>Agriculture release {i}</title>"
+            f"<link>https://example.invalid/news/{i}</link>"
+            f"<pubDate>Mon, 0{1 + i % 9} Jan 2024</pubDate></item>"
+            for i in range(30)
+        )
+        body = f"<rss><channel><title>Fake feed</title>{items}</channel></rss>"
+        self._send(body.encode("utf-8"), "application/rss+xml", etag='"rss-v1"')
+
+    def _pib(self):
+        items = "".join(
+            f'<li><a href="/PressReleasePage.aspx?PRID={i}">PIB release {i}</a></li>'
+            for i in range(30)
+        )
+        body = f'<html><body><ul class="release-list">{items}</ul></body></html>'
+        self._send(body.encode("utf-8"), "text/html", etag='"pib-v1"')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_server(port=0, latency=0.0, fail_every=0, days=30):
+    """Starts the server on a daemon thread; returns (server, base_url)."""
+    handler = type("Handler", (FakeUpstreamHandler,), {
+        "records": make_records(days),
+        "latency": latency,
+        "fail_every": fail_every,
+        "requests_seen": 0,
+        "lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8898)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server, base_url = start_fake_server(args.port, args.latency, args.fail_every)
+    print(f"Fake upstreams on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
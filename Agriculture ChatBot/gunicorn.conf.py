@@ -0,0 +1,18 @@
+# gunicorn -c gunicorn.conf.py app:app
+#
+# Upstream calls run on the async I/O loop in upstream.py; request threads
+# only wait on them. gthread workers make those waits cheap, so a few
+# processes with many threads each keep serving while upstreams are slow.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 32))
+timeout = 60
+
+
+def post_fork(server, worker):
+    # Network work starts in each worker, not when app.py is imported
+    from app import start_background_tasks
+    start_background_tasks()
@@ -1,40 +1,41 @@
 import os
-import time
-from groq import Groq
-from gtts import gTTS
 
-groq_client = Groq(api_key="")
+from answer_cache import answer_cache
+from prompts import build_messages
+from voice_pipeline import get_voice_pipeline
 
 def transcribe_audio(filepath):
     with open(filepath, "rb") as f:
-        response = groq_client.audio.transcriptions.create(
-            model="whisper-large-v3-turbo",
-            file=f,
-        )
-    return response.text
+        return get_voice_pipeline().transcribe(f, os.path.basename(filepath))
 
-def get_answer(question):
-    response = groq_client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[
-            {"role": "system", "content": "You are a helpful agriculture chatbot for Indian farmers."},
-            {"role": "user", "content": "Give a Brief Of Agriculture Seasons in India"},
-            {"role": "system", "content": "In India, the agricultural season consists of three major seasons: the Kharif (monsoon), the Rabi (winter), and the Zaid (summer)..."},
-            {"role": "user", "content": question}
-        ]
-    )
-    return response.choices[0].message.content
+def speak_answer(question, filename, lang="en"):
+    """
+    Streams the answer: tokens are printed as they arrive and each sentence
+    is synthesized and appended to the MP3 while later ones are generated.
+    """
+    pipeline = get_voice_pipeline()
+    output_path = f"{filename}.mp3"
+    cached = answer_cache.get(question, lang)
+    tokens = []
 
-def typing_effect(text, delay=0.03):
-    for char in text:
-        print(char, end='', flush=True)
-        time.sleep(delay)
-    print()  # Newline at end
+    def on_text(token):
+        tokens.append(token)
+        print(token, end="", flush=True)
 
-def text_to_speech(text, filename):
-    tts = gTTS(text)
-    output_path = f"{filename}.mp3"
-    tts.save(output_path)
+    if cached is not None:
+        print(cached, end="")
+        sentences = pipeline.speak(cached, lang)
+    else:
+        sentences = pipeline.run(build_messages(question), lang, on_text=on_text)
+
+    with open(output_path, "wb") as f:
+        for _, audio in sentences:
+            f.write(audio)
+            f.flush()
+    print()
+
+    if cached is None:
+        answer_cache.put(question, lang, "".join(tokens))
     return output_path
 
 def main():
@@ -57,13 +58,8 @@ def main():
         return
 
     print("🤖 Getting response from LLM...")
-    answer = get_answer(question)
-
     print("\n✅ Answer:")
-    typing_effect(answer) 
-
-    print("\n🔊 Converting answer to speech...")
-    audio_file = text_to_speech(answer, "response_audio")
+    audio_file = speak_answer(question, "response_audio")
     print(f"🎧 Voice saved to: {audio_file}")
 
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Date windows (in days, counted back from the latest arrival date in the
+# snapshot) that get precomputed aggregates. 0 = whole snapshot.
+AGGREGATE_WINDOWS = (0, 1, 7, 30)
+
+AGGREGATE_FIELDS = ("mean", "median", "min", "max", "weighted_modal", "samples")
+
+# Joins (market, commodity) into one string group key
+KEY_SEPARATOR = "\x1f"
+
+
+def window_start(latest_day, window_days):
+    if not window_days or not latest_day:
+        return None
+    latest = date.fromisoformat(latest_day)
+    return (latest - timedelta(days=window_days - 1)).isoformat()
+
+
+def _group_stats_numpy(keys, values, weights):
+    """Per-group stats for parallel lists, vectorized with NumPy."""
+    uniques, inverse = np.unique(np.array(keys), return_inverse=True)
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    groups = len(uniques)
+
+    counts = np.bincount(inverse, minlength=groups)
+    means = np.bincount(inverse, weights=values, minlength=groups) / counts
+
+    mins = np.full(groups, np.inf)
+    maxs = np.full(groups, -np.inf)
+    np.minimum.at(mins, inverse, values)
+    np.maximum.at(maxs, inverse, values)
+
+    weight_sums = np.bincount(inverse, weights=weights, minlength=groups)
+    weighted = np.bincount(inverse, weights=values * weights, minlength=groups)
+    weighted = np.divide(weighted, weight_sums, out=means.copy(), where=weight_sums > 0)
+
+    # Median: sort by (group, value) once, then pick the middle of each run
+    order = np.lexsort((values, inverse))
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    lower = sorted_values[starts + (counts - 1) // 2]
+    upper = sorted_values[starts + counts // 2]
+    medians = (lower + upper) / 2
+
+    return {
+        str(uniques[i]): (means[i], medians[i], mins[i], maxs[i], weighted[i], int(counts[i]))
+        for i in range(groups)
+    }
+
+
+def _group_stats_python(keys, values, weights):
+    grouped = {}
+    for key, value, weight in zip(keys, values, weights):
+        grouped.setdefault(key, []).append((value, weight))
+
+    stats = {}
+    for key, items in grouped.items():
+        prices = sorted(value for value, _ in items)
+        n = len(prices)
+        mean = sum(prices) / n
+        median = (prices[(n - 1) // 2] + prices[n // 2]) / 2
+        weight_sum = sum(weight for _, weight in items)
+        weighted = (
+            sum(value * weight for value, weight in items) / weight_sum
+            if weight_sum > 0 else mean
+        )
+        stats[key] = (mean, median, prices[0], prices[-1], weighted, n)
+    return stats
+
+
+def group_stats(keys, values, weights):
+    """
+    keys, values, weights: parallel lists; keys are strings.
+    Returns {key: (mean, median, min, max, weighted_mean, samples)}.
+    """
+    if not keys:
+        return {}
+    if np is not None:
+        return _group_stats_numpy(keys, values, weights)
+    return _group_stats_python(keys, values, weights)
+
+
+def compute_aggregates(rows):
+    """
+    rows: (market, commodity, arrival_day, modal_value, arrival_qty) tuples
+    of one state's snapshot.
+
+    Returns (market, commodity, window_days, mean, median, min, max,
+    weighted_modal, samples) tuples; market "" is the state-wide aggregate.
+    The weighted modal price uses arrival quantity where the source reports
+    it and falls back to equal weights otherwise.
+    """
+    rows = [r for r in rows if r[1] and r[3]]
+    latest_day = max((r[2] for r in rows if r[2]), default=None)
+
+    results = []
+    for window_days in AGGREGATE_WINDOWS:
+        start = window_start(latest_day, window_days)
+        window_rows = rows if start is None else [r for r in rows if r[2] and r[2] >= start]
+        if not window_rows:
+            continue
+
+        values = [r[3] for r in window_rows]
+        weights = [r[4] if r[4] else 1.0 for r in window_rows]
+
+        state_keys = [KEY_SEPARATOR + r[1] for r in window_rows]
+        market_keys = [(r[0] or "") + KEY_SEPARATOR + r[1] for r in window_rows]
+
+        for keys in (state_keys, market_keys):
+            for key, stats in group_stats(keys, values, weights).items():
+                market, commodity = key.split(KEY_SEPARATOR, 1)
+                if keys is market_keys and not market:
+                    continue
+                mean, median, low, high, weighted, samples = stats
+                results.append((
+                    market, commodity, window_days,
+                    round(float(mean), 2), round(float(median), 2),
+                    round(float(low), 2), round(float(high), 2),
+                    round(float(weighted), 2), samples,
+                ))
+
+    return results
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from concurrent.futures import as_completed
+
+from upstream import upstreams
+
+
+class MandiIngestor:
+    """
+    Pages through the complete data.gov.in mandi resource for a state (or
+    one market) instead of a single truncated request.
+
+    Pages are fetched concurrently on the shared async I/O loop (at most
+    max_workers in flight) and written to the store's staging table as
+    they arrive. The set of finished
+    pages is checkpointed, so an interrupted sync resumes where it stopped;
+    the snapshot is swapped in only once every page is present.
+    """
+
+    def __init__(self, store, base_url, api_key, resource_id,
+                 page_size=1000, max_workers=4, timeout=20):
+        self.store = store
+        self.url = f"{base_url.rstrip('/')}/resource/{resource_id}"
+        self.api_key = api_key
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+        self._in_flight = None
+
+        self.progress = {}
+        self._progress_lock = threading.Lock()
+
+    async def fetch_page(self, state, market, offset):
+        params = {
+            "api-key": self.api_key,
+            "format": "json",
+            "offset": offset,
+            "limit": self.page_size,
+            "filters[state]": state,
+        }
+        if market:
+            params["filters[market]"] = market
+
+        if self._in_flight is None:
+            # Created lazily so it binds to the I/O loop
+            self._in_flight = asyncio.Semaphore(self.max_workers)
+
+        async with self._in_flight:
+            data = await upstreams.get_json(self.url, params=params, timeout=self.timeout)
+        return data.get("records", []), int(data.get("total") or 0)
+
+    def _set_progress(self, scope, done, total_pages):
+        with self._progress_lock:
+            self.progress[scope] = {"pages_done": done, "pages_total": total_pages}
+
+    def sync(self, state, market=""):
+        """
+        Fetches every page of the scope into the store.
+        Returns the number of pages stored, or None if the sync is incomplete
+        (it will resume from the checkpoint next time).
+        """
+        scope = f"{state}|{market}"
+
+        first_page, total = upstreams.run(self.fetch_page(state, market, 0))
+        offsets = list(range(0, total, self.page_size)) or [0]
+
+        checkpoint = self.store.checkpoint(scope)
+        if checkpoint and checkpoint["total"] == total and checkpoint["page_size"] == self.page_size:
+            run_id = checkpoint["run_id"]
+            done = checkpoint["done_offsets"]
+            print(f"Resuming mandi sync for {scope}: {len(done)}/{len(offsets)} pages")
+        else:
+            run_id = self.store.start_sync(scope, total, self.page_size)
+            done = set()
+
+        if 0 not in done:
+            self.store.stage_page(scope, run_id, state, market, 0, first_page)
+            done.add(0)
+        self._set_progress(scope, len(done), len(offsets))
+
+        remaining = [offset for offset in offsets if offset not in done]
+        failed = False
+
+        futures = {
+            upstreams.submit(self.fetch_page(state, market, offset)): offset
+            for offset in remaining
+        }
+        for future in as_completed(futures):
+            offset = futures[future]
+            try:
+                records, _ = future.result()
+            except Exception as e:
+                print(f"Mandi page error for {scope} at offset {offset}:", e)
+                failed = True
+                continue
+
+            self.store.stage_page(scope, run_id, state, market, offset, records)
+            done.add(offset)
+            self._set_progress(scope, len(done), len(offsets))
+
+        if failed:
+            return None
+
+        self.store.commit_sync(scope, run_id, state, market)
+        print(f"Stored mandi data for {scope}: {total} records in {len(offsets)} pages")
+        return len(offsets)
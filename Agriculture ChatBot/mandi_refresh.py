@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+class KeyedLocks:
+    """One lock per key, created on demand."""
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+
+class MandiBusyError(Exception):
+    """A key has never been fetched and another worker is still fetching it."""
+
+    def __init__(self, state, market=""):
+        super().__init__(f"Mandi data for {market or state} is still loading")
+        self.state = state
+        self.market = market
+
+
+class MandiRefresher:
+    """
+    Stale-while-revalidate access to the mandi store.
+
+    Requests always get the last good snapshot immediately together with
+    its timestamp; stale snapshots are refreshed in the background. Only a
+    key that has never been fetched blocks the caller. Refreshes of the same
+    key are serialized by a per-key lock inside the process and by a lease
+    row in the store across worker processes, so simultaneous misses make a
+    single upstream call.
+
+    load(state, market) fetches a scope ("" market = whole state) into the
+    store and returns True on success. Only `states` are served, so client
+    input cannot grow the per-key state without bound.
+    """
+
+    def __init__(self, store, load, states, ttl_seconds,
+                 interval_seconds=900, hot_markets=10, lease_seconds=600,
+                 cold_wait_seconds=20):
+        self.store = store
+        self.load = load
+        self.states = list(states)
+        self.ttl = ttl_seconds
+        self.interval = interval_seconds
+        self.hot_markets = hot_markets
+        self.lease_seconds = lease_seconds
+        self.cold_wait_seconds = cold_wait_seconds
+
+        self._locks = KeyedLocks()
+        self._market_hits = Counter()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="mandi-refresh")
+        self._thread = None
+        self._stop = threading.Event()
+
+    # -------------------------------------------------
+    # Refresh
+    # -------------------------------------------------
+    def _age(self, state, market=""):
+        fetched_at = self.store.snapshot_time(state, market)
+        return None if fetched_at is None else time.time() - fetched_at
+
+    def refresh(self, state, market="", max_age=None):
+        """
+        Fetches the key unless it is younger than `max_age` (defaults to the
+        TTL). Returns True when the store was updated.
+        """
+        max_age = self.ttl if max_age is None else max_age
+
+        with self._locks.get((state, market)):
+            age = self._age(state, market)
+            if age is not None and age < max_age:
+                return False
+
+            scope = f"{state}|{market}"
+            if not self.store.try_lease(scope, self.lease_seconds):
+                return False
+
+            try:
+                return bool(self.load(state, market))
+            finally:
+                self.store.release_lease(scope)
+
+    def _refresh_in_background(self, state, market=""):
+        key = (state, market)
+        with self._pending_lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+
+        def run():
+            try:
+                self.refresh(state, market)
+            except Exception as e:
+                print("Mandi refresh error:", e)
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(key)
+
+        self._executor.submit(run)
+
+    # -------------------------------------------------
+    # Snapshots
+    # -------------------------------------------------
+    def _wait_for_snapshot(self, state, market=""):
+        """
+        Waits while another worker holds the lease on a key that has no
+        snapshot yet. Raises MandiBusyError if it is still fetching after
+        cold_wait_seconds; returns as soon as it stores the snapshot or
+        gives up.
+        """
+        scope = f"{state}|{market}"
+        deadline = time.monotonic() + self.cold_wait_seconds
+
+        while self.store.lease_held(scope):
+            if self.store.has_snapshot(state, market):
+                return
+            if time.monotonic() >= deadline:
+                raise MandiBusyError(state, market)
+            time.sleep(0.25)
+
+    def _snapshot(self, state, market=""):
+        if state not in self.states:
+            raise ValueError(f"Unsupported state: {state}")
+
+        age = self._age(state, market)
+
+        if age is None:
+            # Nothing stored yet: this caller has to wait once
+            self.refresh(state, market)
+            if not self.store.has_snapshot(state, market):
+                self._wait_for_snapshot(state, market)
+        elif age >= self.ttl:
+            self._refresh_in_background(state, market)
+
+        return self.store.snapshot_time(state, market)
+
+    def state_snapshot(self, state):
+        """(records, fetched_at) for a state; fetched_at is None if never fetched."""
+        fetched_at = self._snapshot(state)
+        return self.store.records(state), fetched_at
+
+    def market_snapshot(self, state, market):
+        self._market_hits[(state, market)] += 1
+        fetched_at = self._snapshot(state, market)
+        return self.store.records(state, market), fetched_at
+
+    def ensure_state(self, state):
+        """Makes sure a state snapshot exists; returns its fetched_at."""
+        return self._snapshot(state)
+
+    def ensure_market(self, state, market):
+        self._market_hits[(state, market)] += 1
+        return self._snapshot(state, market)
+
+    # -------------------------------------------------
+    # Scheduler
+    # -------------------------------------------------
+    def refresh_all(self):
+        # Refresh a little early so keys never go stale between runs
+        max_age = max(self.ttl - self.interval, 0)
+
+        for state in self.states:
+            try:
+                self.refresh(state, max_age=max_age)
+            except Exception as e:
+                print(f"Mandi prefetch error for {state}:", e)
+
+        for (state, market), _ in self._market_hits.most_common(self.hot_markets):
+            try:
+                self.refresh(state, market, max_age=max_age)
+            except Exception as e:
+                print(f"Mandi prefetch error for {market}, {state}:", e)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_all()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="mandi-prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
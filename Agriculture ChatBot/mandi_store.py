@@ -0,0 +1,411 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from mandi_aggregates import AGGREGATE_FIELDS, compute_aggregates
+
+RECORD_FIELDS = (
+    "state", "district", "market", "commodity", "variety", "grade",
+    "arrival_date", "min_price", "max_price", "modal_price",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    state       TEXT NOT NULL,
+    market      TEXT NOT NULL DEFAULT '',
+    fetched_at  REAL NOT NULL,
+    PRIMARY KEY (state, market)
+);
+
+CREATE TABLE IF NOT EXISTS records (
+    state        TEXT NOT NULL,
+    scope_market TEXT NOT NULL DEFAULT '',
+    district     TEXT,
+    market       TEXT,
+    commodity    TEXT,
+    variety      TEXT,
+    grade        TEXT,
+    arrival_date TEXT,
+    arrival_day  TEXT,
+    min_price    TEXT,
+    max_price    TEXT,
+    modal_price  TEXT,
+    modal_value  REAL,
+    arrival_qty  REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_records_lookup
+    ON records (state, market, commodity, arrival_day);
+
+CREATE TABLE IF NOT EXISTS staged_records (
+    run_id       TEXT NOT NULL,
+    page_offset  INTEGER NOT NULL,
+    state        TEXT NOT NULL,
+    scope_market TEXT NOT NULL DEFAULT '',
+    district     TEXT,
+    market       TEXT,
+    commodity    TEXT,
+    variety      TEXT,
+    grade        TEXT,
+    arrival_date TEXT,
+    arrival_day  TEXT,
+    min_price    TEXT,
+    max_price    TEXT,
+    modal_price  TEXT,
+    modal_value  REAL,
+    arrival_qty  REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_staged_run
+    ON staged_records (run_id, page_offset);
+
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    scope        TEXT PRIMARY KEY,
+    run_id       TEXT NOT NULL,
+    total        INTEGER NOT NULL,
+    page_size    INTEGER NOT NULL,
+    done_offsets TEXT NOT NULL,
+    updated_at   REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS aggregates (
+    state          TEXT NOT NULL,
+    market         TEXT NOT NULL,
+    commodity      TEXT NOT NULL,
+    window_days    INTEGER NOT NULL,
+    mean           REAL,
+    median         REAL,
+    min            REAL,
+    max            REAL,
+    weighted_modal REAL,
+    samples        INTEGER,
+    PRIMARY KEY (state, market, window_days, commodity)
+);
+
+CREATE TABLE IF NOT EXISTS leases (
+    scope       TEXT PRIMARY KEY,
+    expires_at  REAL NOT NULL
+);
+"""
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_iso_day(arrival_date):
+    # data.gov.in sends dd/mm/yyyy; store a sortable copy
+    try:
+        return datetime.strptime(arrival_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def record_row(state, scope_market, r):
+    return (
+        state,
+        scope_market,
+        r.get("district"),
+        r.get("market"),
+        r.get("commodity"),
+        r.get("variety"),
+        r.get("grade"),
+        r.get("arrival_date"),
+        to_iso_day(r.get("arrival_date")),
+        r.get("min_price"),
+        r.get("max_price"),
+        r.get("modal_price"),
+        to_float(r.get("modal_price")),
+        to_float(r.get("arrivals_in_qtl") or r.get("arrivals")),
+    )
+
+
+RECORD_COLUMNS = (
+    "state, scope_market, district, market, commodity, variety, grade,"
+    " arrival_date, arrival_day, min_price, max_price, modal_price, modal_value, arrival_qty"
+)
+
+SORTABLE_AGGREGATES = ("mean", "median", "min", "max", "weighted_modal")
+
+
+class MandiStore:
+    """
+    SQLite (WAL) store for data.gov.in mandi records.
+
+    A snapshot row tracks when a scope was last fetched: (state, "") for a
+    whole state, (state, market) for a single market. Records remember the
+    scope they were fetched for. Replacing a scope is one transaction, so
+    concurrent workers never see half-written data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+
+    def _migrate(self, conn):
+        for table in ("records", "staged_records"):
+            columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            # Stores created before records remembered their fetch scope;
+            # their rows all came from whole-state fetches
+            if "scope_market" not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN scope_market TEXT NOT NULL DEFAULT ''")
+            # Stores created before arrival quantities were kept
+            if "arrival_qty" not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN arrival_qty REAL")
+
+        # Created here rather than in SCHEMA so it follows the column migration
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_records_scope ON records (state, scope_market)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -------------------------------------------------
+    # Snapshots / TTL
+    # -------------------------------------------------
+    def snapshot_time(self, state, market=""):
+        row = self._conn().execute(
+            "SELECT fetched_at FROM snapshots WHERE state = ? AND market = ?",
+            (state, market),
+        ).fetchone()
+        return row["fetched_at"] if row else None
+
+    def is_fresh(self, state, ttl_seconds, market=""):
+        fetched_at = self.snapshot_time(state, market)
+        return fetched_at is not None and time.time() - fetched_at < ttl_seconds
+
+    def has_snapshot(self, state, market=""):
+        return self.snapshot_time(state, market) is not None
+
+    def try_lease(self, scope, lease_seconds):
+        """
+        Claims the right to refresh `scope` for `lease_seconds`.
+        Returns False while another worker holds an unexpired lease.
+        """
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO leases (scope, expires_at) VALUES (?, ?)"
+                " ON CONFLICT (scope) DO UPDATE SET expires_at = excluded.expires_at"
+                " WHERE leases.expires_at < ?",
+                (scope, now + lease_seconds, now),
+            )
+        return cursor.rowcount == 1
+
+    def lease_held(self, scope):
+        """True while some worker holds an unexpired lease on `scope`."""
+        row = self._conn().execute(
+            "SELECT 1 FROM leases WHERE scope = ? AND expires_at >= ?",
+            (scope, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def release_lease(self, scope):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM leases WHERE scope = ?", (scope,))
+
+    def replace_records(self, state, records, market=""):
+        """Replaces every stored record of the scope with `records`."""
+        rows = [record_row(state, market, r) for r in records]
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM records WHERE state = ? AND scope_market = ?", (state, market)
+            )
+            conn.executemany(
+                f"INSERT INTO records ({RECORD_COLUMNS})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (state, market, fetched_at) VALUES (?, ?, ?)",
+                (state, market, time.time()),
+            )
+            if not market:
+                self._rebuild_aggregates(conn, state)
+
+    def _rebuild_aggregates(self, conn, state):
+        """Precomputes price aggregates for a freshly stored state snapshot."""
+        rows = conn.execute(
+            "SELECT market, commodity, arrival_day, modal_value, arrival_qty FROM records"
+            " WHERE state = ? AND scope_market = '' AND modal_value IS NOT NULL AND modal_value != 0",
+            (state,),
+        ).fetchall()
+
+        conn.execute("DELETE FROM aggregates WHERE state = ?", (state,))
+        conn.executemany(
+            "INSERT INTO aggregates (state, market, commodity, window_days, mean, median,"
+            " min, max, weighted_modal, samples) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(state,) + row for row in compute_aggregates([tuple(r) for r in rows])],
+        )
+
+    # -------------------------------------------------
+    # Paginated sync (staging + resume checkpoints)
+    # -------------------------------------------------
+    def checkpoint(self, scope):
+        row = self._conn().execute(
+            "SELECT run_id, total, page_size, done_offsets FROM sync_checkpoints WHERE scope = ?",
+            (scope,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "run_id": row["run_id"],
+            "total": row["total"],
+            "page_size": row["page_size"],
+            "done_offsets": set(json.loads(row["done_offsets"])),
+        }
+
+    def start_sync(self, scope, total, page_size):
+        """Starts a fresh staged sync for `scope`, discarding any older one."""
+        run_id = uuid.uuid4().hex
+        conn = self._conn()
+        with conn:
+            old = conn.execute(
+                "SELECT run_id FROM sync_checkpoints WHERE scope = ?", (scope,)
+            ).fetchone()
+            if old:
+                conn.execute("DELETE FROM staged_records WHERE run_id = ?", (old["run_id"],))
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_checkpoints"
+                " (scope, run_id, total, page_size, done_offsets, updated_at)"
+                " VALUES (?, ?, ?, ?, '[]', ?)",
+                (scope, run_id, total, page_size, time.time()),
+            )
+        return run_id
+
+    def stage_page(self, scope, run_id, state, market, offset, records):
+        """Stores one fetched page and marks its offset done, atomically."""
+        rows = [(run_id, offset) + record_row(state, market, r) for r in records]
+
+        conn = self._conn()
+        with conn:
+            row = conn.execute(
+                "SELECT done_offsets FROM sync_checkpoints WHERE scope = ? AND run_id = ?",
+                (scope, run_id),
+            ).fetchone()
+            if row is None:
+                return
+            done = set(json.loads(row["done_offsets"]))
+            if offset in done:
+                return
+
+            conn.executemany(
+                f"INSERT INTO staged_records (run_id, page_offset, {RECORD_COLUMNS})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            done.add(offset)
+            conn.execute(
+                "UPDATE sync_checkpoints SET done_offsets = ?, updated_at = ? WHERE scope = ?",
+                (json.dumps(sorted(done)), time.time(), scope),
+            )
+
+    def commit_sync(self, scope, run_id, state, market=""):
+        """Swaps the staged rows in as the scope's snapshot."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM records WHERE state = ? AND scope_market = ?", (state, market)
+            )
+            conn.execute(
+                f"INSERT INTO records ({RECORD_COLUMNS})"
+                f" SELECT {RECORD_COLUMNS} FROM staged_records"
+                " WHERE run_id = ? ORDER BY page_offset, rowid",
+                (run_id,),
+            )
+            conn.execute("DELETE FROM staged_records WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM sync_checkpoints WHERE scope = ?", (scope,))
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (state, market, fetched_at) VALUES (?, ?, ?)",
+                (state, market, time.time()),
+            )
+            if not market:
+                self._rebuild_aggregates(conn, state)
+
+    # -------------------------------------------------
+    # Queries
+    # -------------------------------------------------
+    def records(self, state, market=None):
+        """
+        State-wide records, or one market's records. A market uses its own
+        snapshot when it has one, otherwise the rows of the state snapshot.
+        """
+        fields = ", ".join(RECORD_FIELDS)
+        if market:
+            scope = market if self.has_snapshot(state, market) else ""
+            rows = self._conn().execute(
+                f"SELECT {fields} FROM records"
+                " WHERE state = ? AND scope_market = ? AND market = ? ORDER BY rowid",
+                (state, scope, market),
+            )
+        else:
+            rows = self._conn().execute(
+                f"SELECT {fields} FROM records"
+                " WHERE state = ? AND scope_market = '' ORDER BY rowid",
+                (state,),
+            )
+        return [dict(row) for row in rows]
+
+    def markets(self, state):
+        rows = self._conn().execute(
+            "SELECT DISTINCT market FROM records"
+            " WHERE state = ? AND market IS NOT NULL AND market != ''"
+            " ORDER BY market",
+            (state,),
+        )
+        return [row["market"] for row in rows]
+
+    def commodities(self, state, market=None):
+        """Distinct commodities of one market, or of the whole state."""
+        if market:
+            rows = self._conn().execute(
+                "SELECT DISTINCT commodity FROM records"
+                " WHERE state = ? AND market = ? AND commodity IS NOT NULL AND commodity != ''"
+                " ORDER BY commodity",
+                (state, market),
+            )
+        else:
+            rows = self._conn().execute(
+                "SELECT DISTINCT commodity FROM records"
+                " WHERE state = ? AND commodity IS NOT NULL AND commodity != ''"
+                " ORDER BY commodity",
+                (state,),
+            )
+        return [row["commodity"] for row in rows]
+
+    def top_commodities(self, state, limit=10, sort="mean", market="", window_days=0):
+        """
+        Top-k commodities from the precomputed aggregates.
+        Returns dicts with commodity plus every AGGREGATE_FIELDS value.
+        """
+        if sort not in SORTABLE_AGGREGATES:
+            raise ValueError(f"Unsupported sort: {sort}")
+
+        fields = ", ".join(AGGREGATE_FIELDS)
+        rows = self._conn().execute(
+            f"SELECT commodity, {fields} FROM aggregates"
+            " WHERE state = ? AND market = ? AND window_days = ?"
+            f" ORDER BY {sort} DESC LIMIT ?",
+            (state, market, window_days, limit),
+        )
+        return [dict(row) for row in rows]
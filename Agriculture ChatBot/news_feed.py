@@ -0,0 +1,219 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from xml.etree import ElementTree as ET
+
+from bs4 import BeautifulSoup
+
+from upstream import first_completed, upstreams
+
+GOOGLE_RSS_URL = os.environ.get(
+    "NEWS_RSS_URL",
+    "https://news.google.com/rss/search?q=Department+Agriculture+Farmers+Welfare+India+government&hl=en-IN&gl=IN&ceid=IN:en",
+)
+PIB_URL = os.environ.get("PIB_URL", "https://pib.gov.in/allRel.aspx")
+
+
+async def parse_rss(response, limit):
+    """
+    Pulls <item> elements out of an RSS body as its chunks arrive
+    (XMLPullParser fed from aiter_bytes), clearing each one after use and
+    closing the stream as soon as `limit` items are read.
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    items = []
+
+    async for chunk in response.aiter_bytes():
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag != "item":
+                continue
+
+            title = elem.findtext("title", "")
+            if title:
+                items.append({
+                    "title": title,
+                    "link": elem.findtext("link", ""),
+                    "published": elem.findtext("pubDate", datetime.now().strftime("%a, %d %b %Y"))
+                })
+            elem.clear()
+
+            if len(items) >= limit:
+                return items
+    return items
+
+
+async def parse_pib(response, limit):
+    await response.aread()
+    soup = BeautifulSoup(response.text, "html.parser")
+    items = []
+
+    for item in soup.select("ul.release-list li, .all-release li")[:limit]:
+        title_tag = item.find("a")
+        if not title_tag:
+            continue
+
+        title = title_tag.get_text(strip=True)
+        link = title_tag.get("href", "")
+
+        if link and not link.startswith("http"):
+            link = "https://pib.gov.in/" + link.lstrip("/")
+
+        if title:
+            items.append({
+                "title": title,
+                "link": link,
+                "published": datetime.now().strftime("%d %b %Y")
+            })
+    return items
+
+
+class FeedSource:
+    """One upstream feed polled with ETag / If-Modified-Since."""
+
+    def __init__(self, name, url, parser, headers, timeout):
+        self.name = name
+        self.url = url
+        self.parser = parser
+        self.headers = headers
+        self.timeout = timeout
+        self.etag = None
+        self.last_modified = None
+        self.last_status = None
+
+    async def poll(self, limit):
+        """Returns new items, [] when unchanged (304), or None on failure."""
+        headers = dict(self.headers)
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            async with upstreams.stream("GET", self.url, headers=headers, timeout=self.timeout) as r:
+                self.last_status = r.status_code
+                if r.status_code == 304:
+                    return []
+                if r.status_code != 200:
+                    return None
+
+                self.etag = r.headers.get("ETag") or self.etag
+                self.last_modified = r.headers.get("Last-Modified") or self.last_modified
+
+                return await self.parser(r, limit)
+        except Exception as e:
+            print(f"{self.name} error:", e)
+            self.last_status = "error"
+            return None
+
+
+class NewsFeed:
+    """
+    Background-polled agriculture news. Each source keeps a bounded
+    in-memory ring deduplicated by link; readers get Google News RSS items
+    and fall back to the PIB ring only while RSS has nothing.
+
+    Both sources are polled concurrently on the shared I/O loop. A cold
+    start races them and returns as soon as either has items. While every
+    source is failing, requests do not retry the race each time: failed
+    attempts back off from `retry_seconds`, doubling up to the poll
+    interval.
+    """
+
+    def __init__(self, headers, max_items=100, interval_seconds=600, retry_seconds=15):
+        self.max_items = max_items
+        self.interval = interval_seconds
+        self.retry_seconds = retry_seconds
+        self.sources = [
+            FeedSource("google-rss", GOOGLE_RSS_URL, parse_rss, headers, timeout=10),
+            FeedSource("pib-scrape", PIB_URL, parse_pib, headers, timeout=15),
+        ]
+
+        self._rings = {source.name: OrderedDict() for source in self.sources}
+        self._updated_at = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def _merge(self, source_name, items):
+        with self._lock:
+            ring = OrderedDict()
+            for item in items + list(self._rings[source_name].values()):
+                key = item["link"] or item["title"]
+                if key not in ring:
+                    ring[key] = item
+            while len(ring) > self.max_items:
+                ring.popitem(last=True)
+            self._rings[source_name] = ring
+
+    async def _poll(self, source):
+        items = await source.poll(self.max_items)
+        if items is None:
+            return False
+
+        if items:
+            self._merge(source.name, items)
+        with self._lock:
+            self._updated_at = time.time()
+        return True
+
+    async def _refresh_all(self):
+        results = await asyncio.gather(*(self._poll(source) for source in self.sources))
+        return any(results)
+
+    def refresh(self):
+        """Polls every source once, concurrently; returns True if any answered."""
+        return upstreams.run(self._refresh_all())
+
+    def latest(self, count):
+        """(items, source, updated_at) straight from memory."""
+        with self._lock:
+            for source in self.sources:
+                ring = self._rings[source.name]
+                if ring:
+                    return list(ring.values())[:count], source.name, self._updated_at
+            return [], None, self._updated_at
+
+    def ensure_loaded(self):
+        if self._updated_at is not None or time.time() < self._retry_at:
+            return
+
+        # One cold-start race at a time; callers queued behind it re-check
+        with self._load_lock:
+            if self._updated_at is not None or time.time() < self._retry_at:
+                return
+
+            upstreams.run(first_completed(
+                (self._poll(source) for source in self.sources),
+                accept=lambda answered: answered and any(self._rings.values()),
+            ))
+
+            if self._updated_at is None:
+                self._failures += 1
+                delay = min(self.retry_seconds * 2 ** (self._failures - 1), self.interval)
+                self._retry_at = time.time() + delay
+                print(f"News sources unavailable, retrying in {delay}s")
+            else:
+                self._failures = 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print("News refresh error:", e)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="news-feed", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
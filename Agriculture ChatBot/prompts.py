@@ -0,0 +1,13 @@
+LLM_MODEL = "llama3-70b-8192"
+TRANSCRIBE_MODEL = "whisper-large-v3-turbo"
+
+# Few-shot prefix sent ahead of every farmer question
+FEW_SHOT_MESSAGES = [
+    {"role": "system", "content": "You are a helpful agriculture chatbot for Indian farmers."},
+    {"role": "user", "content": "Give a Brief Of Agriculture Seasons in India"},
+    {"role": "system", "content": "In India, the agricultural season consists of three major seasons: the Kharif (monsoon), the Rabi (winter), and the Zaid (summer)..."},
+]
+
+
+def build_messages(question):
+    return FEW_SHOT_MESSAGES + [{"role": "user", "content": question}]
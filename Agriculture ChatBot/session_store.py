@@ -0,0 +1,171 @@
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+def new_session_token():
+    return secrets.token_urlsafe(18)
+
+
+def valid_session_token(token):
+    return bool(token) and TOKEN_PATTERN.match(token) is not None
+
+
+class SessionContext:
+    """Conversation state of one chat session."""
+
+    __slots__ = ("state", "market", "expires_at")
+
+    def __init__(self, state=None, market=None, expires_at=0.0):
+        self.state = state
+        self.market = market
+        self.expires_at = expires_at
+
+    def reset(self):
+        self.state = None
+        self.market = None
+
+
+class MemorySessionStore:
+    """
+    In-process store: an OrderedDict kept in last-use order, so expired and
+    overflowing sessions are always at the front and are dropped on write.
+    Only correct with a single worker process.
+    """
+
+    def __init__(self, ttl_seconds, max_size):
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            context = self._sessions.get(token)
+            if context is None:
+                return None
+            if context.expires_at <= time.time():
+                del self._sessions[token]
+                return None
+            self._sessions.move_to_end(token)
+            return SessionContext(context.state, context.market, context.expires_at)
+
+    def put(self, token, context):
+        now = time.time()
+        with self._lock:
+            self._sessions[token] = SessionContext(context.state, context.market, now + self.ttl)
+            self._sessions.move_to_end(token)
+
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if len(self._sessions) <= self.max_size and oldest.expires_at > now:
+                    break
+                self._sessions.popitem(last=False)
+
+    def delete(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def stats(self):
+        with self._lock:
+            return {"backend": "memory", "sessions": len(self._sessions), "max_size": self.max_size}
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite file shared by every worker process, so a
+    conversation survives requests landing on different gunicorn workers.
+    Expired rows are pruned, and the table trimmed to max_size, every
+    `prune_every` writes.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sessions (
+        token       TEXT PRIMARY KEY,
+        state       TEXT,
+        market      TEXT,
+        expires_at  REAL NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions (expires_at);
+    """
+
+    def __init__(self, path, ttl_seconds, max_size, prune_every=200):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_size = max_size
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._writes = 0
+
+        with self._conn() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, token):
+        row = self._conn().execute(
+            "SELECT state, market, expires_at FROM sessions"
+            " WHERE token = ? AND expires_at > ?",
+            (token, time.time()),
+        ).fetchone()
+        return SessionContext(*row) if row else None
+
+    def put(self, token, context):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (token, state, market, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (token, context.state, context.market, time.time() + self.ttl),
+            )
+
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+
+    def delete(self, token):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def prune(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM sessions WHERE token IN ("
+                " SELECT token FROM sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,),
+            )
+
+    def stats(self):
+        (count,) = self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return {"backend": "sqlite", "sessions": count, "max_size": self.max_size}
+
+
+def create_session_store():
+    """Picks the backend from SESSION_BACKEND ("memory" or "sqlite")."""
+    backend = os.environ.get("SESSION_BACKEND", "sqlite").lower()
+    ttl = int(os.environ.get("SESSION_TTL", 1800))
+    max_size = int(os.environ.get("SESSION_MAX", 10000))
+
+    if backend == "memory":
+        return MemorySessionStore(ttl, max_size)
+    if backend == "sqlite":
+        path = os.environ.get("SESSION_DB_PATH", "sessions.db")
+        return SQLiteSessionStore(path, ttl, max_size)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
@@ -0,0 +1,15 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing app must not touch the network or the working directory
+_scratch = tempfile.mkdtemp(prefix="chatbot-tests-")
+os.environ.setdefault("MANDI_DB_PATH", os.path.join(_scratch, "mandi_cache.db"))
+os.environ.setdefault("AUDIO_CACHE_DIR", os.path.join(_scratch, "audio_cache"))
+os.environ.setdefault("SESSION_BACKEND", "memory")
+os.environ.setdefault("MANDI_PREFETCH", "0")
+os.environ.setdefault("NEWS_PREFETCH", "0")
+os.environ.setdefault("VOICE_PRERENDER", "0")
+os.environ.setdefault("VOICE_BACKEND", "fake")
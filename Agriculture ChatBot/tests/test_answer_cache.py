@@ -0,0 +1,95 @@
+import types
+
+import pytest
+
+import answer_cache as answers
+from answer_cache import AnswerCache, normalize_question, same_terms
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answers, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def cache(clock):
+    cache = AnswerCache(max_size=10, ttl=3600, fingerprint="test")
+    cache.put("should I irrigate wheat today", "en", "irrigate")
+    cache.put("fertilizer dose for 2 acre of wheat", "en", "two acres")
+    cache.put("how to control weed in cotton", "en", "weeds")
+    cache.put("how much fertilizer should I use for wheat crop", "en", "fertilizer")
+    return cache
+
+
+@pytest.mark.parametrize("question", [
+    "should I not irrigate wheat today",
+    "fertilizer dose for 5 acre of wheat",
+    "how to control seed in cotton",
+    "how much fertilizer should I use for rice crop",
+])
+def test_different_questions_do_not_share_answers(cache, question):
+    assert cache.get(question, "en") is None
+    assert cache.similar_hits == 0
+
+
+@pytest.mark.parametrize("question", [
+    "How much fertilizer should I use for wheat crop?",
+    "how much fertiliser should I use for wheat crop",
+])
+def test_rewordings_and_spelling_slips_hit(cache, question):
+    assert cache.get(question, "en") == "fertilizer"
+
+
+def test_spelling_slip_is_a_similarity_hit(cache):
+    cache.get("how much fertiliser should I use for wheat crop", "en")
+    assert cache.similar_hits == 1
+
+
+def test_similar_hits_stay_within_language(cache):
+    assert cache.get("how much fertiliser should I use for wheat crop", "hi") is None
+
+
+@pytest.mark.parametrize("a, b, same", [
+    ("should i irrigate wheat", "should i not irrigate wheat", False),
+    ("dose for 2 acre", "dose for 5 acre", False),
+    ("control weed in cotton", "control seed in cotton", False),
+    ("price of grain", "price of rain", False),
+    ("fertilizer for wheat", "fertiliser for wheat", True),
+    ("tomatoes price", "tomato price", True),
+])
+def test_same_terms(a, b, same):
+    assert same_terms(normalize_question(a), normalize_question(b)) is same
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    clock.now += 3599
+    assert cache.get("should I irrigate wheat today", "en") == "irrigate"
+
+    clock.now += 2
+    assert cache.get("should I irrigate wheat today", "en") is None
+    assert cache.get("should i irrigate wheat today?", "en") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = AnswerCache(max_size=2, ttl=3600, fingerprint="test")
+    cache.put("when to sow wheat", "en", "wheat")
+    cache.put("when to sow mustard", "en", "mustard")
+    assert cache.get("when to sow wheat", "en") == "wheat"
+
+    cache.put("when to sow gram", "en", "gram")
+
+    assert cache.get("when to sow mustard", "en") is None
+    assert cache.get("when to sow wheat", "en") == "wheat"
+    assert cache.get("when to sow gram", "en") == "gram"
+    assert cache.stats()["entries"] == 2
+
@@ -0,0 +1,71 @@
+import pytest
+
+from entity_index import STATE_INDEX, MandiEntities, stem, tokenize
+
+COMMODITIES = [
+    "Wheat", "Tomato", "Potato", "Onion", "Green Chilli", "Cotton",
+    "Paddy(Dhan)(Common)", "Bajra(Pearl Millet/Cumbu)",
+]
+MARKETS = ["Amritsar", "Rajkot", "Surat", "Unjha"]
+
+
+@pytest.fixture(scope="module")
+def entities():
+    return MandiEntities(MARKETS, COMMODITIES)
+
+
+def match_commodity(entities, text):
+    return entities.commodities.match(tokenize(text))
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tomatoes price", "Tomato"),
+    ("potatoes", "Potato"),
+    ("onions rate today", "Onion"),
+    ("green chillies", "Green Chilli"),
+])
+def test_plurals_resolve_to_the_singular(entities, text, expected):
+    assert match_commodity(entities, text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("गेहूं का भाव", "Wheat"),
+    ("गेहूँ", "Wheat"),
+    ("ઘઉં નો ભાવ", "Wheat"),
+    ("टमाटर", "Tomato"),
+    ("કપાસ", "Cotton"),
+    ("धान का रेट", "Paddy(Dhan)(Common)"),
+])
+def test_devanagari_and_gujarati_names(entities, text, expected):
+    assert match_commodity(entities, text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("पंजाब", "Punjab"),
+    ("ગુજરાત", "Gujarat"),
+    ("राजस्थान मंडी", "Rajasthan"),
+    ("panjab", "Punjab"),
+])
+def test_state_names_in_every_script(text, expected):
+    assert STATE_INDEX.match(tokenize(text)) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "what is the price",
+    "whats up",
+    "when",
+    "which one",
+])
+def test_common_words_match_nothing(entities, text):
+    assert match_commodity(entities, text) is None
+    assert entities.markets.match(tokenize(text)) is None
+
+
+def test_typos_of_long_names_still_match(entities):
+    assert match_commodity(entities, "wheet price") == "Wheat"
+    assert entities.markets.match(tokenize("rajkot mandi")) == "Rajkot"
+
+
+def test_stem():
+    assert stem("tomatoes") == stem("tomato")
+    assert stem("chillies") == stem("chilli")
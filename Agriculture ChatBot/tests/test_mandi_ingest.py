@@ -0,0 +1,92 @@
+import pytest
+
+from fake_upstreams import start_fake_server
+from mandi_ingest import MandiIngestor
+from mandi_store import MandiStore
+
+RESOURCE_ID = "test-resource"
+PAGE_SIZE = 10
+
+
+@pytest.fixture
+def upstream():
+    # 5 Punjab markets x 8 commodities x 2 days = 80 records, 8 pages
+    server, base_url = start_fake_server(days=2)
+    yield server.RequestHandlerClass, base_url
+    server.shutdown()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MandiStore(str(tmp_path / "mandi.db"))
+
+
+def ingestor(store, base_url):
+    return MandiIngestor(store, base_url, "key", RESOURCE_ID, page_size=PAGE_SIZE, max_workers=2)
+
+
+def test_interrupted_sync_resumes_from_checkpoint(upstream, store):
+    handler, base_url = upstream
+    handler.fail_every = 3
+
+    assert ingestor(store, base_url).sync("Punjab") is None
+
+    checkpoint = store.checkpoint("Punjab|")
+    assert checkpoint["total"] == 80
+    missing = 8 - len(checkpoint["done_offsets"])
+    assert 0 < missing < 8
+    assert not store.has_snapshot("Punjab")
+    assert store.records("Punjab") == []
+
+    handler.fail_every = 0
+    handler.requests_seen = 0
+    assert ingestor(store, base_url).sync("Punjab") == 8
+
+    # Only the first page (for the total) and the missing pages were fetched again
+    assert handler.requests_seen == 1 + missing
+    assert store.checkpoint("Punjab|") is None
+    assert store.has_snapshot("Punjab")
+    assert len(store.records("Punjab")) == 80
+
+
+def test_staged_pages_replace_snapshot_only_on_commit(upstream, store):
+    handler, base_url = upstream
+    store.replace_records("Punjab", [{
+        "state": "Punjab", "district": "Old", "market": "Old", "commodity": "Wheat",
+        "variety": "Other", "grade": "FAQ", "arrival_date": "01/01/2024",
+        "min_price": "1", "max_price": "3", "modal_price": "2",
+    }])
+    old_fetched_at = store.snapshot_time("Punjab")
+
+    run_id = store.start_sync("Punjab|", 20, PAGE_SIZE)
+    store.stage_page("Punjab|", run_id, "Punjab", "", 0, [
+        {"state": "Punjab", "market": "New", "commodity": "Wheat", "modal_price": "10"},
+    ])
+
+    # Staged rows stay invisible until the swap
+    assert [r["market"] for r in store.records("Punjab")] == ["Old"]
+    assert store.snapshot_time("Punjab") == old_fetched_at
+
+    store.stage_page("Punjab|", run_id, "Punjab", "", PAGE_SIZE, [
+        {"state": "Punjab", "market": "New", "commodity": "Paddy", "modal_price": "20"},
+    ])
+    store.commit_sync("Punjab|", run_id, "Punjab")
+
+    assert sorted(r["commodity"] for r in store.records("Punjab")) == ["Paddy", "Wheat"]
+    assert {r["market"] for r in store.records("Punjab")} == {"New"}
+    assert store.snapshot_time("Punjab") >= old_fetched_at
+    assert store.checkpoint("Punjab|") is None
+
+    staged = store._conn().execute("SELECT COUNT(*) FROM staged_records").fetchone()[0]
+    assert staged == 0
+
+
+def test_restarted_sync_discards_stale_staging(upstream, store):
+    old_run = store.start_sync("Punjab|", 20, PAGE_SIZE)
+    store.stage_page("Punjab|", old_run, "Punjab", "", 0, [{"market": "Stale", "commodity": "Wheat"}])
+
+    # The upstream total changed, so the old checkpoint cannot be resumed
+    handler, base_url = upstream
+    assert ingestor(store, base_url).sync("Punjab") == 8
+    assert "Stale" not in {r["market"] for r in store.records("Punjab")}
+    assert len(store.records("Punjab")) == 80
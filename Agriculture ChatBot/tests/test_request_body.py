@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.fixture
+def client():
+    import app as chatbot
+
+    return chatbot.app.test_client()
+
+
+@pytest.mark.parametrize("route", ["/voice", "/speak", "/chat"])
+@pytest.mark.parametrize("body", [[], ["text"], "text", 5, None])
+def test_non_object_json_body_is_a_400(client, route, body):
+    response = client.post(route, json=body)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("route", ["/voice", "/speak", "/chat"])
+def test_non_string_text_is_a_400(client, route):
+    response = client.post(route, json={"text": {"q": "wheat"}, "lang": "en"})
+    assert response.status_code == 400
+
+
+def test_malformed_json_is_a_400(client):
+    response = client.post("/speak", data="{not json", content_type="application/json")
+    assert response.status_code == 400
+
+
+def test_non_string_lang_falls_back_to_hindi(client):
+    response = client.post("/speak", json={"text": "Namaste.", "lang": ["en"]})
+    assert response.status_code == 200
+    response.close()
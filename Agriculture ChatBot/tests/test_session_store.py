@@ -0,0 +1,110 @@
+import types
+
+import pytest
+
+import session_store as sessions
+from session_store import (
+    MemorySessionStore, SessionContext, SQLiteSessionStore,
+    new_session_token, valid_session_token,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "memory":
+        return MemorySessionStore(ttl_seconds=60, max_size=3)
+    return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, max_size=3, prune_every=1)
+
+
+def test_context_round_trip(store):
+    token = new_session_token()
+    store.put(token, SessionContext("Gujarat", "Rajkot"))
+
+    context = store.get(token)
+    assert (context.state, context.market) == ("Gujarat", "Rajkot")
+    assert not hasattr(context, "__dict__")
+
+    # The store hands out copies; changes only land through put()
+    context.market = "Surat"
+    assert store.get(token).market == "Rajkot"
+    store.put(token, context)
+    assert store.get(token).market == "Surat"
+
+
+def test_sessions_expire_after_ttl_of_last_write(store, clock):
+    token = new_session_token()
+    store.put(token, SessionContext("Punjab"))
+
+    clock.now += 59
+    assert store.get(token).state == "Punjab"
+    store.put(token, store.get(token))
+
+    clock.now += 59
+    assert store.get(token) is not None
+
+    clock.now += 2
+    assert store.get(token) is None
+
+
+def test_oldest_sessions_are_trimmed_past_max_size(store, clock):
+    tokens = [new_session_token() for _ in range(4)]
+    for token in tokens:
+        clock.now += 1
+        store.put(token, SessionContext("Punjab"))
+
+    assert store.get(tokens[0]) is None
+    assert all(store.get(token) is not None for token in tokens[1:])
+    assert store.stats()["sessions"] == 3
+
+
+def test_delete(store):
+    token = new_session_token()
+    store.put(token, SessionContext("Punjab"))
+    store.delete(token)
+    assert store.get(token) is None
+
+
+def test_token_format():
+    token = new_session_token()
+    assert valid_session_token(token)
+    assert new_session_token() != token
+    assert not valid_session_token("")
+    assert not valid_session_token("short")
+    assert not valid_session_token("x" * 16 + "'; DROP TABLE sessions; --")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import app as chatbot
+
+    monkeypatch.setattr(chatbot, "session_store", MemorySessionStore(ttl_seconds=60, max_size=100))
+    return chatbot.app.test_client()
+
+
+def test_malformed_token_is_replaced(client):
+    response = client.post("/reset", json={}, headers={"X-Session-Token": "bad token"})
+    token = response.get_json()["session_token"]
+
+    assert token != "bad token"
+    assert valid_session_token(token)
+
+
+def test_known_token_is_kept(client):
+    first = client.post("/reset", json={}).get_json()["session_token"]
+    second = client.post("/reset", json={}, headers={"X-Session-Token": first}).get_json()["session_token"]
+    assert second == first
@@ -0,0 +1,53 @@
+import concurrent.futures
+import time
+
+import pytest
+
+from fake_upstreams import start_fake_server
+from upstream import CircuitOpen, Upstreams
+
+
+@pytest.fixture
+def slow_upstream():
+    server, base_url = start_fake_server(latency=0.5, days=1)
+    yield base_url
+    server.shutdown()
+
+
+def half_open(upstreams, url):
+    health = upstreams.health(url)
+    health.failures = health.failure_threshold
+    health.opened_at = time.monotonic() - health.reset_timeout
+    return health
+
+
+def test_cancelled_trial_frees_the_half_open_breaker(slow_upstream):
+    upstreams = Upstreams(failure_threshold=1, reset_timeout=5)
+    url = f"{slow_upstream}/v1/forecast"
+    health = half_open(upstreams, url)
+
+    future = upstreams.submit(upstreams.get_json(url))
+    time.sleep(0.1)
+    assert health.trial_running
+    future.cancel()
+    with pytest.raises(concurrent.futures.CancelledError):
+        future.result(1)
+    time.sleep(0.1)
+
+    assert not health.trial_running
+    assert health.state == "half-open"
+    assert upstreams.run(upstreams.get_json(url), timeout=5)["current_weather"]
+    assert health.state == "closed"
+
+
+def test_failed_trial_reopens_the_breaker():
+    upstreams = Upstreams(failure_threshold=1, reset_timeout=5)
+    url = "http://127.0.0.1:9/unreachable"
+    health = half_open(upstreams, url)
+
+    with pytest.raises(Exception):
+        upstreams.run(upstreams.get_json(url, timeout=1), timeout=5)
+
+    assert health.state == "open"
+    with pytest.raises(CircuitOpen):
+        upstreams.run(upstreams.get_json(url), timeout=5)
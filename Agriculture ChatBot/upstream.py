@@ -0,0 +1,244 @@
+import asyncio
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+
+class CircuitOpen(httpx.TransportError):
+    """Raised instead of calling a host whose breaker is open."""
+
+
+class HostHealth:
+    """
+    Circuit breaker and latency histogram of one upstream host. Only touched
+    from the I/O loop thread, so it needs no locking.
+
+    After `failure_threshold` consecutive failures calls fail immediately
+    for `reset_timeout` seconds, then a single trial call decides whether
+    the breaker closes again.
+    """
+
+    BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000)
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.latency_counts = [0] * (len(self.BOUNDS_MS) + 1)
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record(self, ok, seconds):
+        self.latency_counts[bisect_left(self.BOUNDS_MS, seconds * 1000)] += 1
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+        else:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+        self.trial_running = False
+
+    def release(self):
+        """Ends a call that gave no verdict (cancelled), freeing the half-open trial."""
+        self.trial_running = False
+
+    def percentile(self, fraction):
+        total = sum(self.latency_counts)
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS + (None,), self.latency_counts):
+            seen += count
+            if total and seen >= fraction * total:
+                return bound
+        return None
+
+    def stats(self):
+        return {
+            "breaker": self.state,
+            "failures": self.failures,
+            "calls": sum(self.latency_counts),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+        }
+
+
+class Upstreams:
+    """
+    Async I/O layer for the chatbot's upstream calls.
+
+    One event loop runs in a daemon thread and owns an httpx.AsyncClient per
+    upstream host, so every request to the same API shares one keep-alive
+    pool. Sync Flask handlers hand coroutines to the loop with run() or
+    submit() and only wait on the result; the waiting is cheap under gthread
+    workers, and many slow upstream calls can be in flight at once without
+    each one pinning its own socket and thread.
+
+    Calls made through get()/stream() go through the host's circuit breaker:
+    while a host is down they fail at once, and callers fall back to the
+    data they already have instead of waiting out the timeout.
+    """
+
+    def __init__(self, max_connections=20, timeout=15, failure_threshold=5, reset_timeout=30):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clients = {}
+        self._health = {}
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="upstream-io", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    @staticmethod
+    def host(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def health(self, url):
+        host = self.host(url)
+        health = self._health.get(host)
+        if health is None:
+            health = self._health[host] = HostHealth(self.failure_threshold, self.reset_timeout)
+        return health
+
+    def client(self, url):
+        """Shared AsyncClient for the host of `url`; only used on the loop thread."""
+        host = self.host(url)
+
+        client = self._clients.get(host)
+        if client is None:
+            client = self._clients[host] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+                follow_redirects=True,
+            )
+        return client
+
+    def submit(self, coro):
+        """Schedules a coroutine on the I/O loop; returns a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro, timeout=None):
+        """Runs a coroutine on the I/O loop and blocks until it finishes."""
+        return self.submit(coro).result(timeout)
+
+    def _check(self, url):
+        health = self.health(url)
+        if not health.allow():
+            raise CircuitOpen(f"Circuit open for {urlsplit(url).netloc}")
+        return health
+
+    async def get(self, url, **kwargs):
+        health = self._check(url)
+        started = time.perf_counter()
+        recorded = False
+        try:
+            r = await self.client(url).get(url, **kwargs)
+            health.record(r.status_code < 500, time.perf_counter() - started)
+            recorded = True
+            return r
+        except Exception:
+            health.record(False, time.perf_counter() - started)
+            recorded = True
+            raise
+        finally:
+            # CancelledError is not an Exception; without this a cancelled
+            # trial call would leave the breaker half-open for good
+            if not recorded:
+                health.release()
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        """client.stream() through the host's breaker; timed until headers arrive."""
+        health = self._check(url)
+        started = time.perf_counter()
+        recorded = False
+        try:
+            async with self.client(url).stream(method, url, **kwargs) as r:
+                health.record(r.status_code < 500, time.perf_counter() - started)
+                recorded = True
+                yield r
+        except Exception:
+            if not recorded:
+                health.record(False, time.perf_counter() - started)
+                recorded = True
+            raise
+        finally:
+            if not recorded:
+                health.release()
+
+    async def get_json(self, url, params=None, timeout=None):
+        r = await self.get(url, params=params, timeout=timeout or self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def stats(self):
+        return {host: health.stats() for host, health in list(self._health.items())}
+
+    async def close(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+
+async def first_completed(coros, accept=bool):
+    """
+    Races coroutines; returns the first result that `accept` approves, or
+    None if none does. The losers keep running to completion in the
+    background instead of being cancelled.
+    """
+    pending = {asyncio.ensure_future(coro) for coro in coros}
+
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is None and accept(task.result()):
+                # The loop only holds weak references to tasks
+                for loser in pending:
+                    _background.add(loser)
+                    loser.add_done_callback(_background.discard)
+                return task.result()
+    return None
+
+
+_background = set()
+
+
+upstreams = Upstreams(
+    max_connections=int(os.environ.get("UPSTREAM_MAX_PER_HOST", 20)),
+    failure_threshold=int(os.environ.get("UPSTREAM_BREAKER_FAILURES", 5)),
+    reset_timeout=float(os.environ.get("UPSTREAM_BREAKER_RESET_SECONDS", 30)),
+)
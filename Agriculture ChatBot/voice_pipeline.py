@@ -0,0 +1,300 @@
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from audio_cache import get_audio_cache
+from prompts import LLM_MODEL, TRANSCRIBE_MODEL
+
+try:
+    from groq import Groq
+except Exception:
+    Groq = None
+
+try:
+    from gtts import gTTS
+except Exception:
+    gTTS = None
+
+
+# Sentence end: terminal punctuation (incl. the Devanagari danda) followed by
+# whitespace, or a line break. "3.5" and "Rs.20" are not split.
+SENTENCE_END = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+class SentenceSplitter:
+    """
+    Incrementally turns a token stream into sentences. Pieces shorter than
+    `min_chars` are held back and joined to the next sentence so TTS is not
+    called for fragments like "Yes." on their own.
+    """
+
+    def __init__(self, min_chars=20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token):
+        self._buffer += token
+        sentences = []
+        start = 0
+
+        for match in SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+def stream_sentences(tokens, on_text=None):
+    """Sentences of a token stream as soon as each one is complete."""
+    splitter = SentenceSplitter()
+    for token in tokens:
+        if on_text:
+            on_text(token)
+        yield from splitter.feed(token)
+    yield from splitter.flush()
+
+
+def line_sentences(text):
+    """
+    Sentences of a finished text, line by line. A short line (a list item)
+    is never merged into the next one, so a fixed prompt on its own line
+    is always synthesized as exactly that text and hits the audio cache.
+    """
+    for line in text.splitlines():
+        splitter = SentenceSplitter()
+        yield from splitter.feed(line)
+        yield from splitter.flush()
+
+
+# ----------------------------
+# LLM backends
+# ----------------------------
+
+class GroqLLM:
+    """Streams chat completion tokens from Groq."""
+
+    def __init__(self, client, model=LLM_MODEL):
+        self.client = client
+        self.model = model
+
+    def stream(self, messages):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+        )
+        for chunk in response:
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+
+
+class FakeLLM:
+    """Yields a fixed answer word by word; for local development and tests."""
+
+    def __init__(self, text, token_delay=0.0):
+        self.text = text
+        self.token_delay = token_delay
+
+    def stream(self, messages):
+        for word in re.findall(r"\S+\s*", self.text):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word
+
+
+# ----------------------------
+# Speech backends
+# ----------------------------
+
+class GTTSBackend:
+    """Google Text-to-Speech; returns MP3 bytes per sentence."""
+
+    mimetype = "audio/mpeg"
+
+    def __init__(self, tld="com"):
+        if gTTS is None:
+            raise RuntimeError("gTTS is not installed")
+        self.tld = tld
+        self.voice = f"gtts:{tld}"
+
+    def synthesize(self, text, lang="en"):
+        buffer = BytesIO()
+        gTTS(text, lang=lang, tld=self.tld).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class FakeTTS:
+    """Returns the sentence itself as bytes after `latency` seconds."""
+
+    mimetype = "text/plain"
+    voice = "fake"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def synthesize(self, text, lang="en"):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return f"[{lang}] {text}\n".encode("utf-8")
+
+
+class CachedTTS:
+    """
+    Serves repeated sentences (greetings, prompts, cached answers) from the
+    on-disk audio cache; concurrent requests for the same one share a
+    single synthesis.
+    """
+
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.mimetype = backend.mimetype
+        self.voice = backend.voice
+
+    def synthesize(self, text, lang="en"):
+        return self.cache.get_or_synthesize(text, lang, self.voice, self.backend.synthesize)
+
+
+class GroqTranscriber:
+    def __init__(self, client, model=TRANSCRIBE_MODEL):
+        self.client = client
+        self.model = model
+
+    def transcribe(self, stream, filename="voice.webm"):
+        response = self.client.audio.transcriptions.create(
+            model=self.model,
+            file=(filename, stream.read()),
+        )
+        return response.text
+
+
+class FakeTranscriber:
+    def __init__(self, text=""):
+        self.text = text
+
+    def transcribe(self, stream, filename="voice.webm"):
+        return self.text
+
+
+# ----------------------------
+# Pipeline
+# ----------------------------
+
+class VoicePipeline:
+    """
+    LLM tokens -> sentences -> speech, overlapped.
+
+    A producer thread reads the token stream and submits each finished
+    sentence to a small TTS pool straight away, so sentence N is being
+    synthesized while the LLM is still writing sentence N+1. The caller gets
+    audio in sentence order as soon as each piece is ready: time to first
+    audio is about one sentence of generation plus one synthesis.
+    """
+
+    def __init__(self, llm, tts, transcriber=None, max_parallel=2):
+        self.llm = llm
+        self.tts = tts
+        self.transcriber = transcriber
+        self._executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="tts")
+
+    def transcribe(self, stream, filename="voice.webm"):
+        if self.transcriber is None:
+            raise RuntimeError("No transcriber configured")
+        return self.transcriber.transcribe(stream, filename)
+
+    def _produce(self, sentences, lang, pending, stop):
+        try:
+            for sentence in sentences:
+                if stop.is_set():
+                    return
+                pending.put((sentence, self._executor.submit(self.tts.synthesize, sentence, lang)))
+        except Exception as e:
+            pending.put(e)
+        finally:
+            pending.put(None)
+
+    def run(self, messages, lang="en", on_text=None):
+        """
+        Yields (sentence, audio_bytes) in order. `on_text(token)` is called
+        from the producer thread for every token as it arrives.
+        """
+        return self._speak(stream_sentences(self.llm.stream(messages), on_text), lang)
+
+    def speak(self, text, lang="en"):
+        """Same as run() for a text that is already known (cached answer, chat reply)."""
+        return self._speak(line_sentences(text), lang)
+
+    def _speak(self, sentences, lang):
+        pending = queue.Queue()
+        stop = threading.Event()
+        threading.Thread(
+            target=self._produce,
+            args=(sentences, lang, pending, stop),
+            name="voice-llm",
+            daemon=True,
+        ).start()
+
+        try:
+            while True:
+                item = pending.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                sentence, future = item
+                yield sentence, future.result()
+        finally:
+            # Client went away or an error surfaced: stop reading the LLM
+            stop.set()
+
+
+def create_voice_pipeline(name=None):
+    """VOICE_BACKEND=groq (default) or fake."""
+    name = (name or os.getenv("VOICE_BACKEND", "groq")).lower()
+    max_parallel = int(os.getenv("VOICE_TTS_PARALLEL", 2))
+
+    if name == "fake":
+        return VoicePipeline(
+            FakeLLM(os.getenv("VOICE_FAKE_ANSWER", "This is a test answer. It has two sentences."),
+                    token_delay=float(os.getenv("VOICE_FAKE_TOKEN_DELAY", 0.05))),
+            CachedTTS(FakeTTS(latency=float(os.getenv("VOICE_FAKE_TTS_LATENCY", 0.2))), get_audio_cache()),
+            FakeTranscriber(os.getenv("VOICE_FAKE_TRANSCRIPT", "")),
+            max_parallel=max_parallel,
+        )
+
+    if Groq is None:
+        raise RuntimeError("groq is not installed")
+
+    client = Groq(api_key=os.getenv("GROQ_API_KEY", ""))
+    return VoicePipeline(
+        GroqLLM(client),
+        CachedTTS(GTTSBackend(), get_audio_cache()),
+        GroqTranscriber(client),
+        max_parallel=max_parallel,
+    )
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_voice_pipeline():
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = create_voice_pipeline()
+        return _pipeline
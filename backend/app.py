@@ -1,22 +1,48 @@
 import os
-import uuid
-from flask import Flask, request, jsonify
+import json
+import tempfile
+import threading
+from flask import Flask, Request, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_talisman import Talisman
 
-from config import UPLOAD_FOLDER, ALLOWED_EXTENSIONS, DEFAULT_OUTPUT_LANG
-from ocr.ocr_engine import extract_text_from_image
-from risk.risk_engine import analyze_contract
+from config import (
+    ALLOWED_EXTENSIONS,
+    DEFAULT_OUTPUT_LANG,
+    BATCH_MAX_DOCUMENTS,
+    BATCH_MAX_WORKERS,
+    UPLOAD_SPOOL_THRESHOLD,
+    RATELIMIT_STORAGE_URI,
+)
+from ocr.ocr_engine import OCR_FAILED, extract_text_from_document
+from ocr.image_preprocess import PREPROCESS_MODES
+from risk.risk_engine import analyze_contract, iter_contract_analysis
+from risk.batch_runner import analyze_many
+from risk.result_cache import analysis_cache
+from risk.translator import prewarm as prewarm_translations, translation_service
 from utils.logger import logger
+from utils.rate_limit import rate_limit_key, tiered_limit
+from utils.http_client import CircuitOpenError, HostBusyError, http_client
 
 
 # ----------------------------
 # App Initialization
 # ----------------------------
 
+class SpoolingRequest(Request):
+    """
+    Keeps uploaded files in memory up to UPLOAD_SPOOL_THRESHOLD instead of
+    werkzeug's 500 KB default; bigger files roll over to an anonymous
+    temp file that the OS removes even if the worker dies.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD, mode="rb+")
+
+
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 
 Talisman(app, content_security_policy=None, force_https=False)
 CORS(
@@ -26,18 +52,38 @@ CORS(
         "http://localhost:5173",
         "https://samjhautasetu.vercel.app"
     ],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "X-API-Key"],
     methods=["GET", "POST", "OPTIONS"]
 )
 
 limiter = Limiter(
-    get_remote_address,
+    rate_limit_key,
     app=app,
-    default_limits=["100 per day", "20 per minute"],
-    storage_uri="memory://"
+    default_limits=[tiered_limit("100 per day;20 per minute")],
+    storage_uri=RATELIMIT_STORAGE_URI
 )
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+_background_started = False
+_background_lock = threading.Lock()
+
+
+@app.before_request
+def start_background_tasks():
+    """
+    Startup work that hits the network, run once per worker process on its
+    first request: importing the app (tests, gunicorn's master) stays
+    offline, and every gunicorn worker still gets it.
+    """
+    global _background_started
+    if _background_started:
+        return
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+
+    # Fill the translation memory for all static strings in the background
+    threading.Thread(target=prewarm_translations, name="translation-prewarm", daemon=True).start()
 
 
 @app.after_request
@@ -52,6 +98,19 @@ def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def upload_payload(file):
+    """
+    Bytes of an uploaded file when it was kept in memory, otherwise the
+    spooled file object itself so large uploads are never copied into RAM.
+    """
+    stream = file.stream
+    stream.seek(0)
+
+    if (request.content_length or 0) <= UPLOAD_SPOOL_THRESHOLD:
+        return stream.read()
+    return stream
+
+
 @app.route("/", methods=["GET"])
 def home():
     return "Samjhauta Setu backend running", 200
@@ -59,11 +118,16 @@ def home():
 
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "OK"}), 200
+    return jsonify({
+        "status": "OK",
+        "analysis_cache": analysis_cache.stats(),
+        "translation_memory": translation_service.stats(),
+        "upstreams": http_client.stats()
+    }), 200
 
 
 @app.route("/analyze", methods=["POST"])
-@limiter.limit("10 per minute")
+@limiter.limit(tiered_limit("10 per minute"))
 def analyze_text():
     try:
         data = request.get_json()
@@ -73,11 +137,15 @@ def analyze_text():
 
         text = data.get("text", "").strip()
         output_lang = data.get("lang", DEFAULT_OUTPUT_LANG)
+        previous_analysis_id = data.get("previous_analysis_id")
 
         if not text:
             return jsonify({"success": False, "error": "Empty text"}), 400
 
-        result = analyze_contract(text, output_lang)
+        if previous_analysis_id is not None and not isinstance(previous_analysis_id, str):
+            return jsonify({"success": False, "error": "previous_analysis_id must be a string"}), 400
+
+        result = analyze_contract(text, output_lang, previous_analysis_id=previous_analysis_id)
 
         return jsonify({
             "success": True,
@@ -89,17 +157,135 @@ def analyze_text():
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
 
+@app.route("/analyze/stream", methods=["POST"])
+@limiter.limit(tiered_limit("10 per minute"))
+def analyze_stream():
+    """
+    Streams risky clauses as they are scored.
+    Server-Sent Events by default; ?format=ndjson for chunked NDJSON.
+    """
+    data = request.get_json(silent=True)
+
+    if not data or "text" not in data:
+        return jsonify({"success": False, "error": "No text provided"}), 400
+
+    text = data.get("text", "").strip()
+    output_lang = data.get("lang", DEFAULT_OUTPUT_LANG)
+    use_sse = request.args.get("format", "sse") != "ndjson"
+
+    if not text:
+        return jsonify({"success": False, "error": "Empty text"}), 400
+
+    def encode(event, payload):
+        body = json.dumps(payload, ensure_ascii=False)
+        if use_sse:
+            return f"event: {event}\ndata: {body}\n\n"
+        return json.dumps({"event": event, "data": payload}, ensure_ascii=False) + "\n"
+
+    def generate():
+        try:
+            for event, payload in iter_contract_analysis(text, output_lang):
+                yield encode(event, payload)
+        except Exception:
+            logger.exception("Stream analyze error")
+            yield encode("error", {"success": False, "error": "Internal server error"})
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream" if use_sse else "application/x-ndjson"
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def parse_batch_documents():
+    """
+    Accepts either a JSON body ({"documents": [...], "lang": "hi"} or a bare list)
+    or NDJSON with one document object per line.
+    Returns (documents, error_message).
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+        default_lang = request.args.get("lang", DEFAULT_OUTPUT_LANG)
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if line.strip():
+                items.append(json.loads(line))
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            default_lang = data.get("lang", DEFAULT_OUTPUT_LANG)
+            items = data.get("documents")
+        else:
+            default_lang = request.args.get("lang", DEFAULT_OUTPUT_LANG)
+            items = data
+
+    if not isinstance(items, list) or not items:
+        return None, "No documents provided"
+
+    if len(items) > BATCH_MAX_DOCUMENTS:
+        return None, f"Too many documents (max {BATCH_MAX_DOCUMENTS})"
+
+    documents = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"text": item}
+        if not isinstance(item, dict):
+            return None, f"Invalid document at index {index}"
+
+        text = item.get("text")
+        if not isinstance(text, str):
+            return None, f"Text must be a string at index {index}"
+
+        text = text.strip()
+        if not text:
+            return None, f"Empty text at index {index}"
+
+        documents.append({
+            "id": item.get("id", index),
+            "text": text,
+            "lang": item.get("lang", default_lang)
+        })
+
+    return documents, None
+
+
+@app.route("/analyze/batch", methods=["POST"])
+@limiter.limit(tiered_limit("5 per minute"))
+def analyze_batch():
+    try:
+        documents, error = parse_batch_documents()
+    except ValueError:
+        return jsonify({"success": False, "error": "Invalid NDJSON body"}), 400
+
+    if error:
+        return jsonify({"success": False, "error": error}), 400
+
+    def generate():
+        completed = 0
+        try:
+            for result in analyze_many(documents, BATCH_MAX_WORKERS):
+                completed += 1
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        except Exception:
+            logger.exception("Batch analyze error")
+            yield json.dumps({"success": False, "error": "Internal server error"}) + "\n"
+
+        yield json.dumps({"done": True, "total": len(documents), "completed": completed}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
 @app.route("/scan", methods=["POST"])
-@limiter.limit("5 per minute")
+@limiter.limit(tiered_limit("5 per minute"))
 def scan_document():
-    filepath = None
-
     try:
         if "file" not in request.files:
             return jsonify({"success": False, "error": "No file uploaded"}), 400
 
         file = request.files["file"]
         output_lang = request.form.get("lang", DEFAULT_OUTPUT_LANG)
+        preprocess = request.form.get("preprocess")
 
         if not file.filename:
             return jsonify({"success": False, "error": "Empty filename"}), 400
@@ -107,13 +293,12 @@ def scan_document():
         if not allowed_file(file.filename):
             return jsonify({"success": False, "error": "Unsupported file type"}), 400
 
-        filename = f"{uuid.uuid4().hex}_{file.filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        if preprocess and preprocess not in PREPROCESS_MODES:
+            return jsonify({"success": False, "error": "Unknown preprocess mode"}), 400
 
-        text = extract_text_from_image(filepath)
+        text = extract_text_from_document(upload_payload(file), file.filename, preprocess)
 
-        if not text or len(text.strip()) < 10:
+        if not text or len(text.strip()) < 10 or text.startswith(OCR_FAILED):
             return jsonify({
                 "success": False,
                 "error": "OCR failed or insufficient readable text"
@@ -127,17 +312,18 @@ def scan_document():
             "analysis": analysis
         }), 200
 
+    except CircuitOpenError:
+        logger.warning("Scan rejected: OCR upstream unavailable")
+        return jsonify({"success": False, "error": "OCR service temporarily unavailable"}), 503
+
+    except HostBusyError:
+        logger.warning("Scan rejected: OCR upstream busy")
+        return jsonify({"success": False, "error": "OCR service busy, please retry shortly"}), 503
+
     except Exception:
         logger.exception("Scan error")
         return jsonify({"success": False, "error": "Internal server error"}), 500
 
-    finally:
-        if filepath and os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-            except Exception:
-                pass
-
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
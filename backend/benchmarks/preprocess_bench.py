@@ -0,0 +1,59 @@
+"""
+Compares OCR payload size and latency for each preprocessing mode.
+
+    cd backend
+    python -m benchmarks.preprocess_bench path/to/scan1.jpg path/to/scan2.jpg
+
+Uses the OCR backend configured through OCR_BACKEND / OCR_SPACE_* env vars;
+point OCR_SPACE_URL at `python -m ocr.fake_server` to measure offline.
+"""
+
+import sys
+import time
+
+from ocr.image_preprocess import PREPROCESS_MODES, prepare_for_ocr
+from ocr.ocr_engine import get_backend
+
+
+def bench_file(path, backend):
+    with open(path, "rb") as f:
+        original = f.read()
+
+    rows = []
+    for mode in PREPROCESS_MODES:
+        started = time.perf_counter()
+        payload, filename = prepare_for_ocr(original, path.rsplit("/", 1)[-1], mode)
+        prep_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        try:
+            text = backend.extract(payload, filename)
+        except Exception as e:
+            text = f"error: {e}"
+        ocr_ms = (time.perf_counter() - started) * 1000
+
+        rows.append((mode, len(payload), prep_ms, ocr_ms, len(text or "")))
+
+    return len(original), rows
+
+
+def main(paths):
+    if not paths:
+        print(__doc__)
+        return 1
+
+    backend = get_backend()
+    print(f"backend: {backend.name}\n")
+    print(f"{'file':<30} {'mode':<9} {'bytes sent':>11} {'vs orig':>8} {'prep ms':>8} {'ocr ms':>8} {'chars':>6}")
+
+    for path in paths:
+        original_size, rows = bench_file(path, backend)
+        for mode, size, prep_ms, ocr_ms, chars in rows:
+            ratio = size / original_size if original_size else 0
+            print(f"{path[-30:]:<30} {mode:<9} {size:>11} {ratio:>7.0%} {prep_ms:>8.1f} {ocr_ms:>8.1f} {chars:>6}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -3,5 +3,23 @@ import os
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
-ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
+ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "pdf", "tif", "tiff"}
 DEFAULT_OUTPUT_LANG = "hi"
+
+# Batch analysis (/analyze/batch)
+BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", 500))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", os.cpu_count() or 2))
+
+# Uploads at or below this size stay in memory; larger ones spill to an
+# anonymous temp file (never left behind in UPLOAD_FOLDER).
+UPLOAD_SPOOL_THRESHOLD = int(float(os.getenv("UPLOAD_SPOOL_THRESHOLD_MB", 8)) * 1024 * 1024)
+
+# Rate limiting. The sqlite:// scheme (utils/rate_limit.py) shares counters
+# between workers on one host; memory:// is per process.
+RATELIMIT_STORAGE_URI = os.getenv(
+    "RATELIMIT_STORAGE_URI", "sqlite:///" + os.path.join(BASE_DIR, "cache", "ratelimit.db")
+)
+
+# Trusted batch clients send one of these as X-API-Key and get API_KEY_LIMIT
+API_KEYS = [key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip()]
+API_KEY_LIMIT = os.getenv("API_KEY_LIMIT", "5000 per day;120 per minute")
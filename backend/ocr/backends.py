@@ -0,0 +1,171 @@
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from io import BytesIO
+
+import requests
+
+from utils.http_client import CircuitOpenError, HostBusyError, http_client
+
+try:
+    import pytesseract
+    from PIL import Image
+except Exception:
+    pytesseract = None
+    Image = None
+
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def as_stream(data):
+    """Binary file object for `data` (bytes or an already open file)."""
+    if hasattr(data, "read"):
+        data.seek(0)
+        return data
+    return BytesIO(data)
+
+
+class OCRBackend(ABC):
+    """
+    Interface for OCR providers.
+    extract() takes the raw image as bytes or as a binary file object.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def extract(self, data, filename="upload.png"):
+        """Returns the recognized text."""
+
+
+class OCRSpaceBackend(OCRBackend):
+    """
+    OCR.Space HTTP API over the shared pooled client (keep-alive, per-host
+    circuit breaker), a cap on concurrent in-flight calls and retries with
+    exponential backoff + jitter. An open breaker or a saturated
+    host is not retried.
+    """
+
+    name = "ocrspace"
+
+    def __init__(self, api_key, url="https://api.ocr.space/parse/image",
+                 language="eng", max_in_flight=4, max_retries=3,
+                 backoff_base=0.5, backoff_max=8.0, timeout=(5, 30)):
+        super().__init__()
+        self.api_key = api_key
+        self.url = url
+        self.language = language
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def _backoff(self, attempt):
+        # "Full jitter": sleep a random amount up to the exponential cap
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        time.sleep(random.uniform(0, cap))
+
+    def _post(self, data, filename):
+        with self._slots:
+            return http_client.post(
+                self.url,
+                files={"file": (filename, as_stream(data))},
+                data={
+                    "apikey": self.api_key,
+                    "language": self.language,
+                    "isOverlayRequired": False,
+                },
+                timeout=self.timeout,
+            )
+
+    def extract(self, data, filename="upload.png"):
+        if not self.api_key:
+            return "OCR API key not configured."
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self._post(data, filename)
+            except (CircuitOpenError, HostBusyError):
+                # Breaker open, or every slot stayed busy for acquire_timeout
+                raise
+            except (requests.ConnectionError, requests.Timeout):
+                if last_attempt:
+                    raise
+                self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRYABLE_STATUS and not last_attempt:
+                self._backoff(attempt)
+                continue
+
+            break
+
+        result = response.json()
+
+        if result.get("IsErroredOnProcessing"):
+            return ""
+
+        parsed_results = result.get("ParsedResults")
+
+        if not parsed_results:
+            return ""
+
+        return parsed_results[0].get("ParsedText", "").strip()
+
+
+class TesseractBackend(OCRBackend):
+    """Local OCR through pytesseract (needs the tesseract binary)."""
+
+    name = "tesseract"
+
+    def __init__(self, language="eng"):
+        super().__init__()
+        if pytesseract is None:
+            raise RuntimeError("pytesseract is not installed")
+        self.language = language
+
+    def extract(self, data, filename="upload.png"):
+        image = Image.open(as_stream(data))
+        return pytesseract.image_to_string(image, lang=self.language).strip()
+
+
+class FakeOCRBackend(OCRBackend):
+    """Returns fixed text; for local development and tests."""
+
+    name = "fake"
+
+    def __init__(self, text="", latency=0.0):
+        super().__init__()
+        self.text = text
+        self.latency = latency
+        self.calls = 0
+
+    def extract(self, data, filename="upload.png"):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.text
+
+
+def create_backend(name=None):
+    name = (name or os.getenv("OCR_BACKEND", "ocrspace")).lower()
+
+    if name == "tesseract":
+        return TesseractBackend(language=os.getenv("TESSERACT_LANG", "eng"))
+
+    if name == "fake":
+        return FakeOCRBackend(text=os.getenv("OCR_FAKE_TEXT", ""))
+
+    return OCRSpaceBackend(
+        api_key=os.getenv("OCR_SPACE_API_KEY"),
+        url=os.getenv("OCR_SPACE_URL", "https://api.ocr.space/parse/image"),
+        max_in_flight=int(os.getenv("OCR_MAX_IN_FLIGHT", 4)),
+        max_retries=int(os.getenv("OCR_MAX_RETRIES", 3)),
+    )
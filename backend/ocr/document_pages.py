@@ -0,0 +1,86 @@
+import os
+from io import BytesIO
+
+from PIL import Image
+
+try:
+    import fitz  # PyMuPDF
+except Exception:
+    fitz = None
+
+from .image_preprocess import TARGET_DPI
+
+MULTI_PAGE_EXTENSIONS = {"pdf", "tif", "tiff"}
+
+# A PDF page with at least this much embedded text skips OCR entirely
+MIN_TEXT_LAYER_CHARS = int(os.getenv("PDF_MIN_TEXT_LAYER_CHARS", 20))
+
+
+class Page:
+    """One page of an upload: either embedded text or an image to OCR."""
+
+    def __init__(self, index, text=None, image=None, filename="page.png"):
+        self.index = index
+        self.text = text
+        self.image = image
+        self.filename = filename
+
+    @property
+    def needs_ocr(self):
+        return self.text is None
+
+
+def file_extension(filename):
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def _read_bytes(data):
+    if hasattr(data, "read"):
+        data.seek(0)
+        return data.read()
+    return bytes(data)
+
+
+def iter_pdf_pages(data, filename):
+    if fitz is None:
+        raise RuntimeError("PDF support needs PyMuPDF (pip install pymupdf)")
+
+    stem = filename.rsplit(".", 1)[0]
+    with fitz.open(stream=_read_bytes(data), filetype="pdf") as doc:
+        for index, page in enumerate(doc):
+            text = page.get_text().strip()
+            if len(text) >= MIN_TEXT_LAYER_CHARS:
+                yield Page(index, text=text)
+                continue
+
+            pixmap = page.get_pixmap(dpi=TARGET_DPI, colorspace=fitz.csGRAY)
+            yield Page(index, image=pixmap.tobytes("png"), filename=f"{stem}_p{index + 1}.png")
+
+
+def iter_tiff_pages(data, filename):
+    stem = filename.rsplit(".", 1)[0]
+    stream = data if hasattr(data, "read") else BytesIO(data)
+    stream.seek(0)
+
+    with Image.open(stream) as img:
+        for index in range(getattr(img, "n_frames", 1)):
+            img.seek(index)
+            out = BytesIO()
+            img.convert("L").save(out, format="PNG")
+            yield Page(index, image=out.getvalue(), filename=f"{stem}_p{index + 1}.png")
+
+
+def iter_pages(data, filename):
+    """
+    Lazily splits an upload into pages. Single images come back as one page
+    holding the original payload.
+    """
+    extension = file_extension(filename)
+
+    if extension == "pdf":
+        return iter_pdf_pages(data, filename)
+
+    if extension in ("tif", "tiff"):
+        return iter_tiff_pages(data, filename)
+
+    return iter([Page(0, image=data, filename=filename)])
@@ -0,0 +1,76 @@
+"""
+Minimal stand-in for the OCR.Space API, for local runs and tests.
+
+    python -m ocr.fake_server --port 8899 --text "..." --fail-every 3
+    OCR_SPACE_URL=http://127.0.0.1:8899/parse/image OCR_SPACE_API_KEY=x python app.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(text, latency=0.0, fail_every=0):
+    state = {"requests": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+
+            with lock:
+                state["requests"] += 1
+                count = state["requests"]
+
+            if latency:
+                time.sleep(latency)
+
+            if fail_every and count % fail_every == 0:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            body = json.dumps({
+                "IsErroredOnProcessing": False,
+                "ParsedResults": [{"ParsedText": text}]
+            }).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    Handler.state = state
+    return Handler
+
+
+def start_fake_server(text="", port=0, latency=0.0, fail_every=0):
+    """Starts the server on a daemon thread; returns (server, url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(text, latency, fail_every))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/parse/image"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--text", default="The buyer may reject the crop at sole discretion.")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    args = parser.parse_args()
+
+    server, url = start_fake_server(args.text, args.port, args.latency, args.fail_every)
+    print(f"Fake OCR server on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,3 +1,6 @@
+import os
+from io import BytesIO
+
 from PIL import Image, ImageOps
 
 try:
@@ -8,23 +11,120 @@ except Exception:
     np = None
 
 
-def preprocess_image(image_path: str):
+# none     -> send the upload untouched
+# compact  -> fix orientation, grayscale, downscale, re-encode as JPEG
+# binarize -> compact + Otsu threshold, re-encoded as 1-bit PNG
+PREPROCESS_MODES = ("none", "compact", "binarize")
+DEFAULT_PREPROCESS_MODE = os.getenv("OCR_PREPROCESS", "compact")
+if DEFAULT_PREPROCESS_MODE not in PREPROCESS_MODES:
+    raise ValueError(
+        f"OCR_PREPROCESS must be one of {', '.join(PREPROCESS_MODES)}, got {DEFAULT_PREPROCESS_MODE!r}"
+    )
+TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", 200))
+JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY", 80))
+
+# Phone photos carry no useful DPI; assume the short side spans an A4 page.
+ASSUMED_PAGE_WIDTH_INCHES = 8.27
+
+
+def preprocess_image(image_path: str, mode="binarize"):
+    """Returns the preprocessed PIL Image for a file on disk (see preprocess)."""
+    return preprocess(Image.open(image_path), mode)
+
+
+def source_dpi(img):
+    dpi = img.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] > 72:
+        return float(dpi[0])
+    return min(img.size) / ASSUMED_PAGE_WIDTH_INCHES
+
+
+def downscale_to_dpi(img, target_dpi=TARGET_DPI):
+    scale = target_dpi / source_dpi(img)
+    if scale >= 1:
+        return img
+
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    return img.resize(size, Image.LANCZOS)
+
+
+def otsu_threshold(img):
+    """Otsu threshold of a grayscale PIL image using its histogram."""
+    histogram = img.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(i * h for i, h in enumerate(histogram))
+
+    best_threshold, best_variance = 0, 0.0
+    background, weighted_background = 0, 0
+
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+
+        weighted_background += level * count
+        mean_bg = weighted_background / background
+        mean_fg = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_bg - mean_fg) ** 2
+
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+
+    return best_threshold
+
+
+def binarize(img):
+    if cv2 is not None and np is not None:
+        arr = cv2.GaussianBlur(np.array(img), (3, 3), 0)
+        arr = cv2.threshold(arr, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        return Image.fromarray(arr).convert("1")
+
+    threshold = otsu_threshold(img)
+    return img.point(lambda p: 255 if p > threshold else 0).convert("1")
+
+
+def preprocess(img, mode):
+    """Orientation fix, grayscale and downscale; then Otsu threshold for binarize."""
+    img = ImageOps.exif_transpose(img)
+    img = img.convert("L")
+    img = downscale_to_dpi(img)
+    return binarize(img) if mode == "binarize" else img
+
+
+def prepare_for_ocr(data, filename="upload.png", mode=None):
     """
-    Returns a PIL Image that is lightly preprocessed.
-    - If cv2 available -> better preprocessing
-    - If not -> simple PIL grayscale/contrast
+    Runs the preprocessing pipeline on raw upload bytes (or a binary file).
+    Returns (payload, filename) to send to the OCR backend; the filename
+    extension follows the re-encoded format.
+    Falls back to the original upload if the image cannot be decoded.
     """
-    img = Image.open(image_path)
+    mode = mode or DEFAULT_PREPROCESS_MODE
+    if mode not in PREPROCESS_MODES:
+        raise ValueError(f"Unknown preprocess mode: {mode}")
+    if mode == "none":
+        return data, filename
 
-    # Fallback preprocessing (always works)
-    img = ImageOps.exif_transpose(img)   # fix rotation issues
-    img = img.convert("L")               # grayscale
+    try:
+        if hasattr(data, "read"):
+            data.seek(0)
+            img = Image.open(data)
+        else:
+            img = Image.open(BytesIO(data))
 
-    if cv2 is None or np is None:
-        return img
+        img = preprocess(img, mode)
+
+        out = BytesIO()
+        stem = filename.rsplit(".", 1)[0]
+
+        if mode == "binarize":
+            img.save(out, format="PNG", optimize=True)
+            return out.getvalue(), f"{stem}.png"
+
+        img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        return out.getvalue(), f"{stem}.jpg"
 
-    # Enhanced preprocessing using OpenCV
-    arr = np.array(img)
-    arr = cv2.GaussianBlur(arr, (3, 3), 0)
-    arr = cv2.threshold(arr, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-    return Image.fromarray(arr)
+    except Exception:
+        return data, filename
@@ -1,46 +1,116 @@
 import os
-import requests
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-OCR_API_KEY = os.getenv("OCR_SPACE_API_KEY")
+from utils.http_client import CircuitOpenError, HostBusyError
 
+from .backends import create_backend
+from .document_pages import MULTI_PAGE_EXTENSIONS, file_extension, iter_pages
+from .image_preprocess import prepare_for_ocr
 
-def extract_text_from_image(image_path: str) -> str:
+OCR_PAGE_WORKERS = int(os.getenv("OCR_PAGE_WORKERS", 4))
+
+# Upstream outages are not OCR results: they propagate so /scan can answer 503
+UPSTREAM_UNAVAILABLE = (CircuitOpenError, HostBusyError)
+
+# Prefix of the text returned instead of raising when OCR itself fails
+OCR_FAILED = "OCR failed: "
+
+_backend = None
+_page_executor = None
+_page_executor_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the OCR backend (e.g. a FakeOCRBackend in tests)."""
+    global _backend
+    _backend = backend
+
+
+def extract_text_from_bytes(data, filename="upload.png", preprocess=None) -> str:
     """
-    Uses OCR.Space API to extract text from image.
-    Production-safe for Render (no system dependencies).
+    Runs OCR on in-memory image bytes (or a binary file object) with the
+    configured backend (OCR_BACKEND=ocrspace|tesseract|fake).
+    `preprocess` picks a mode from image_preprocess.PREPROCESS_MODES.
+    Raises CircuitOpenError / HostBusyError when the OCR upstream is down
+    or saturated.
     """
+    try:
+        payload, filename = prepare_for_ocr(data, filename, preprocess)
+        return get_backend().extract(payload, filename)
+    except UPSTREAM_UNAVAILABLE:
+        raise
+    except Exception as e:
+        return f"{OCR_FAILED}{str(e)}"
 
-    if not OCR_API_KEY:
-        return "OCR API key not configured."
 
-    try:
-        url = "https://api.ocr.space/parse/image"
-
-        with open(image_path, "rb") as image_file:
-            response = requests.post(
-                url,
-                files={"file": image_file},
-                data={
-                    "apikey": OCR_API_KEY,
-                    "language": "eng",
-                    "isOverlayRequired": False,
-                },
-                timeout=30,
+def _get_page_executor():
+    global _page_executor
+    with _page_executor_lock:
+        if _page_executor is None:
+            _page_executor = ThreadPoolExecutor(
+                max_workers=OCR_PAGE_WORKERS,
+                thread_name_prefix="ocr-page"
             )
+        return _page_executor
 
-        result = response.json()
 
-        if result.get("IsErroredOnProcessing"):
-            return ""
+def _ocr_page(page, preprocess):
+    payload, filename = prepare_for_ocr(page.image, page.filename, preprocess)
+    return get_backend().extract(payload, filename)
 
-        parsed_results = result.get("ParsedResults")
 
-        if not parsed_results:
-            return ""
+def extract_text_from_document(data, filename, preprocess=None) -> str:
+    """
+    OCR for single images as well as multi-page PDF/TIFF uploads.
+    Pages are produced lazily and OCR'd concurrently on a bounded pool;
+    PDF pages with an embedded text layer skip OCR. Page texts are joined
+    in page order.
+    """
+    if file_extension(filename) not in MULTI_PAGE_EXTENSIONS:
+        return extract_text_from_bytes(data, filename, preprocess)
 
-        extracted_text = parsed_results[0].get("ParsedText", "").strip()
+    executor = _get_page_executor()
+    texts = []
+    pending = deque()
 
-        return extracted_text
+    def collect(entry):
+        index, future = entry
+        try:
+            texts.append((index, future.result() or ""))
+        except UPSTREAM_UNAVAILABLE:
+            raise
+        except Exception:
+            texts.append((index, ""))
+
+    try:
+        for page in iter_pages(data, filename):
+            if page.needs_ocr:
+                pending.append((page.index, executor.submit(_ocr_page, page, preprocess)))
+            else:
+                texts.append((page.index, page.text))
+
+            # Keep only a window of rendered pages in memory
+            while len(pending) > OCR_PAGE_WORKERS * 2:
+                collect(pending.popleft())
+
+        while pending:
+            collect(pending.popleft())
 
     except Exception as e:
-        return f"OCR failed: {str(e)}"
+        for _, future in pending:
+            future.cancel()
+        if isinstance(e, UPSTREAM_UNAVAILABLE):
+            raise
+        return f"{OCR_FAILED}{str(e)}"
+
+    texts.sort(key=lambda entry: entry[0])
+    return "\n\n".join(text.strip() for _, text in texts if text.strip())
@@ -0,0 +1,118 @@
+# risk/batch_runner.py
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .risk_engine import analyze_contract, localize_analysis
+from .result_cache import analysis_cache, content_key
+from utils.text_cleaner import normalize_lines
+
+# Workers must not be forked from the threaded server: a lock held by
+# another request thread at fork time stays locked forever in the child.
+# A forkserver forks them from a clean single-threaded process instead.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers):
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            context = multiprocessing.get_context(START_METHOD)
+            if START_METHOD == "forkserver":
+                context.set_forkserver_preload(["risk.risk_engine"])
+            _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+            atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+        return _executor
+
+
+def reset_executor(broken):
+    """
+    Drops a pool whose worker died (crash, OOM kill) so the next call to
+    get_executor starts a fresh one. No-op if it was already replaced.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_all(documents, max_workers):
+    executor = get_executor(max_workers)
+    try:
+        return executor, {
+            executor.submit(_analyze_document, doc["text"]): doc
+            for doc in documents
+        }
+    except BrokenProcessPool:
+        reset_executor(executor)
+
+    executor = get_executor(max_workers)
+    return executor, {
+        executor.submit(_analyze_document, doc["text"]): doc
+        for doc in documents
+    }
+
+
+def _analyze_document(text):
+    # Runs inside a worker process. Its own caches die with it; the
+    # parent looks up and fills the shared analysis_cache and localizes
+    # the explanations through its translation memory.
+    return analyze_contract(text, "en", use_cache=False)
+
+
+def analyze_many(documents, max_workers):
+    """
+    documents: list of dicts with "id", "text" and "lang".
+    Yields one result dict per document, in completion order.
+    """
+    pending = []
+    for doc in documents:
+        cached = analysis_cache.get(content_key(normalize_lines(doc["text"])))
+        if cached is not None:
+            yield {"id": doc["id"], "success": True, "analysis": localize_analysis(cached, doc["lang"])}
+        else:
+            pending.append(doc)
+
+    if not pending:
+        return
+
+    executor, futures = submit_all(pending, max_workers)
+
+    try:
+        for future in as_completed(futures):
+            doc = futures[future]
+            try:
+                analysis = future.result()
+                if analysis.get("analysis_id"):
+                    analysis_cache.put(analysis["analysis_id"], analysis)
+                yield {
+                    "id": doc["id"],
+                    "success": True,
+                    "analysis": localize_analysis(analysis, doc["lang"])
+                }
+            except BrokenProcessPool:
+                reset_executor(executor)
+                yield {
+                    "id": doc["id"],
+                    "success": False,
+                    "error": "Analysis failed: worker process died"
+                }
+            except Exception as e:
+                yield {
+                    "id": doc["id"],
+                    "success": False,
+                    "error": f"Analysis failed: {type(e).__name__}"
+                }
+    finally:
+        # Client went away: drop whatever has not started yet
+        for future in futures:
+            future.cancel()
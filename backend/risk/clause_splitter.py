@@ -2,17 +2,46 @@
 
 import re
 
+CLAUSE_SEPARATOR = re.compile(r'\n+|\.\s+|;\s+|\d+\.\s+')
 
-def split_into_clauses(text):
+
+def iter_clause_spans(text):
     """
-    Splits contract into logical clauses.
-    Works for multilingual text.
+    Lazily yields (start, end) offsets of each stripped clause inside
+    `text`, using the same split as split_into_clauses.
     """
+    start = 0
+
+    for match in CLAUSE_SEPARATOR.finditer(text):
+        span = _clause_span(text, start, match.start())
+        if span:
+            yield span
+        start = match.end()
+
+    span = _clause_span(text, start, len(text))
+    if span:
+        yield span
+
+
+def split_into_clause_spans(text):
+    return list(iter_clause_spans(text))
 
-    # Split by common legal separators
-    clauses = re.split(r'\n+|\.\s+|;\s+|\d+\.\s+', text)
+
+def _clause_span(text, start, end):
+    piece = text[start:end]
+    stripped = piece.strip()
 
     # Remove very short noise clauses
-    cleaned = [c.strip() for c in clauses if len(c.strip()) > 30]
+    if len(stripped) <= 30:
+        return None
+
+    lead = len(piece) - len(piece.lstrip())
+    return start + lead, start + lead + len(stripped)
 
-    return cleaned
+
+def split_into_clauses(text):
+    """
+    Splits contract into logical clauses.
+    Works for multilingual text.
+    """
+    return [text[start:end] for start, end in split_into_clause_spans(text)]
@@ -0,0 +1,59 @@
+# risk/clause_store.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from .result_cache import RULES_VERSION
+
+CLAUSE_STORE_SIZE = int(os.getenv("CLAUSE_STORE_SIZE", 256))
+
+
+def clause_hash(clause, language=""):
+    digest = hashlib.blake2b(clause.encode("utf-8"), digest_size=16)
+    digest.update(language.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ClauseStore:
+    """
+    Remembers per-clause scores of recent analyses (by analysis_id) so an
+    edited resubmission only has to rescore the clauses that changed.
+    """
+
+    def __init__(self, max_size=CLAUSE_STORE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, analysis_id):
+        with self._lock:
+            return analysis_id in self._entries
+
+    def get(self, analysis_id, language):
+        """Clause scores for `analysis_id`, or None if unknown or not reusable."""
+        with self._lock:
+            entry = self._entries.get(analysis_id)
+            if entry is None:
+                return None
+            self._entries.move_to_end(analysis_id)
+
+        if entry["language"] != language or entry["rules_version"] != RULES_VERSION:
+            return None
+        return entry["clauses"]
+
+    def put(self, analysis_id, language, clauses):
+        """clauses: {clause_hash: (score, flags)}"""
+        with self._lock:
+            self._entries[analysis_id] = {
+                "language": language,
+                "rules_version": RULES_VERSION,
+                "clauses": clauses
+            }
+            self._entries.move_to_end(analysis_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+clause_store = ClauseStore()
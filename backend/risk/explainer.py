@@ -12,6 +12,7 @@ EXPLANATION_MAP = {
 
 
 def generate_clause_explanation(flags):
+    """English explanations for the flags; risk_engine localizes them."""
     explanations = []
 
     for flag in flags:
@@ -23,4 +24,4 @@ def generate_clause_explanation(flags):
         if flag["type"] == "pattern":
             explanations.append(flag.get("description", ""))
 
-    return list(set(explanations))
+    return list(dict.fromkeys(explanations))
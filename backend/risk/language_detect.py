@@ -1,15 +1,79 @@
 # risk/language_detect.py
 
-from langdetect import detect
+import re
+from functools import lru_cache
 
 SUPPORTED_LANGUAGES = ["en", "hi", "gu", "pa", "kn"]
 
+# Each supported Indic language has its own script, so most documents
+# can be classified from code point ranges without any statistical model.
+SCRIPT_PATTERNS = {
+    "hi": re.compile("[\u0900-\u097F]"),  # Devanagari
+    "pa": re.compile("[\u0A00-\u0A7F]"),  # Gurmukhi
+    "gu": re.compile("[\u0A80-\u0AFF]"),  # Gujarati
+    "kn": re.compile("[\u0C80-\u0CFF]"),  # Kannada
+    "en": re.compile("[A-Za-z]"),         # Latin
+}
+
+# Share of script letters a language needs to win without n-gram detection
+DOMINANT_SHARE = 0.6
+SAMPLE_WINDOW = 700
+
+
+def sample_text(text, window=SAMPLE_WINDOW):
+    """Bounded sample: start, middle and end of the document."""
+    if len(text) <= window * 3:
+        return text
+    middle = len(text) // 2 - window // 2
+    return text[:window] + "\n" + text[middle:middle + window] + "\n" + text[-window:]
+
+
+def script_counts(text):
+    return {lang: len(pattern.findall(text)) for lang, pattern in SCRIPT_PATTERNS.items()}
+
+
+def dominant_script(counts):
+    """(language, share) of the most frequent script, or (None, 0)."""
+    total = sum(counts.values())
+    if not total:
+        return None, 0.0
+    lang = max(counts, key=counts.get)
+    return lang, counts[lang] / total
+
+
+@lru_cache(maxsize=1024)
+def _ngram_detect(sample):
+    from langdetect import DetectorFactory, detect
+
+    # Seeded so the same text always gets the same answer
+    DetectorFactory.seed = 0
+    return detect(sample)
+
 
 def detect_language(text):
+    sample = sample_text(text)
+    lang, share = dominant_script(script_counts(sample))
+
+    if lang and share >= DOMINANT_SHARE:
+        return lang
+
+    # Mixed-script text (or no letters at all): fall back to n-grams
     try:
-        lang = detect(text)
-        if lang in SUPPORTED_LANGUAGES:
-            return lang
-        return "en"
-    except:
-        return "en"
+        detected = _ngram_detect(sample)
+        if detected in SUPPORTED_LANGUAGES:
+            return detected
+    except Exception:
+        pass
+
+    return lang or "en"
+
+
+def detect_clause_language(clause, default):
+    """
+    Script-only detection for one clause; keeps `default` (the document
+    language) when the clause has no clearly dominant script.
+    """
+    lang, share = dominant_script(script_counts(clause))
+    if lang and share >= DOMINANT_SHARE:
+        return lang
+    return default
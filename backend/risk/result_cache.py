@@ -0,0 +1,202 @@
+# risk/result_cache.py
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .keywords import RISK_KEYWORDS, RISK_WEIGHTS
+from .rule_engine import PATTERN_RULES
+from .explainer import EXPLANATION_MAP
+
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", 512))
+ANALYSIS_CACHE_DB = os.getenv("ANALYSIS_CACHE_DB", "")
+ANALYSIS_CACHE_DISK_MAX = int(os.getenv("ANALYSIS_CACHE_DISK_MAX", 20000))
+
+
+def rules_fingerprint():
+    """
+    Hash of every rule table that influences an analysis result.
+    Any edit to keywords, weights, patterns or explanations changes it.
+    """
+    payload = json.dumps(
+        [RISK_KEYWORDS, RISK_WEIGHTS, PATTERN_RULES, EXPLANATION_MAP],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+RULES_VERSION = rules_fingerprint()
+
+
+def content_key(normalized_text):
+    """Key of a (language-neutral) analysis; explanations are localized after lookup."""
+    digest = hashlib.sha256()
+    for part in (RULES_VERSION, normalized_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Bounded in-memory LRU of analysis results with an optional SQLite tier
+    that survives restarts and is shared between worker processes.
+
+    Results are deep-copied on the way in and out, so callers may add keys
+    (language, analysis_id, ...) to what they get back.
+    """
+
+    def __init__(self, max_size=ANALYSIS_CACHE_SIZE, db_path=ANALYSIS_CACHE_DB,
+                 disk_max=ANALYSIS_CACHE_DISK_MAX):
+        self.max_size = max_size
+        self.db_path = db_path
+        self.disk_max = disk_max
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._puts = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.db_path:
+            self._init_db()
+
+    # ----------------------------
+    # Disk tier
+    # ----------------------------
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                " key TEXT PRIMARY KEY,"
+                " rules_version TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed"
+                " ON analysis_cache (accessed_at)"
+            )
+            # Entries produced by older rule sets can never be hit again
+            conn.execute(
+                "DELETE FROM analysis_cache WHERE rules_version != ?",
+                (RULES_VERSION,)
+            )
+
+    def _disk_get(self, key):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT result FROM analysis_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        with conn:
+            conn.execute(
+                "UPDATE analysis_cache SET accessed_at = ? WHERE key = ?",
+                (time.time(), key)
+            )
+        return json.loads(row[0])
+
+    def _disk_put(self, key, result):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache"
+                " (key, rules_version, result, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, RULES_VERSION, json.dumps(result, ensure_ascii=False), time.time())
+            )
+
+            with self._lock:
+                self._puts += 1
+                prune = self._puts % 100 == 0
+            if prune:
+                conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN ("
+                    " SELECT key FROM analysis_cache"
+                    " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_max,)
+                )
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+
+        if self.db_path:
+            try:
+                result = self._disk_get(key)
+            except sqlite3.Error:
+                result = None
+
+            if result is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, copy.deepcopy(result))
+                return result
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, result):
+        self._remember(key, copy.deepcopy(result))
+
+        if self.db_path:
+            try:
+                self._disk_put(key, result)
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_tier": bool(self.db_path),
+                "rules_version": RULES_VERSION
+            }
+
+
+analysis_cache = AnalysisCache()
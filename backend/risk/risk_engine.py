@@ -1,60 +1,84 @@
 # risk/risk_engine.py
 
-import re
-from .keywords import RISK_KEYWORDS, RISK_WEIGHTS
-from .language_detect import detect_language
-from .clause_splitter import split_into_clauses
+from .rule_engine import score_clause, score_clause_spans
+from .language_detect import detect_language, detect_clause_language
+from .clause_splitter import iter_clause_spans, split_into_clause_spans
 from .explainer import generate_clause_explanation
-
-PATTERN_RULES = {
-    "buyer_may_discretion": {
-        "pattern": r"(buyer|purchaser).*(sole discretion)",
-        "weight": 4,
-        "description": "Buyer has sole decision power."
-    },
-    "reject_without_reason": {
-        "pattern": r"(reject|refuse).*(without reason)",
-        "weight": 4,
-        "description": "Buyer can reject crop without justification."
-    },
-    "payment_delay": {
-        "pattern": r"(payment).*(after sale|at buyer convenience)",
-        "weight": 3,
-        "description": "Payment may be delayed."
-    }
-}
+from .translator import translate_many
+from .result_cache import analysis_cache, content_key
+from .clause_store import clause_store, clause_hash
+from utils.text_cleaner import normalize_lines
 
 
 def calculate_clause_risk(clause, language):
-    text_lower = clause.lower()
-    keywords = RISK_KEYWORDS.get(language, RISK_KEYWORDS["en"])
-
-    score = 0
-    flags = []
-
-    # Keyword-based scoring
-    for word in keywords:
-        if re.search(re.escape(word.lower()), text_lower):
-            weight = RISK_WEIGHTS.get(word.lower(), 1)
-            score += weight
-            flags.append({
-                "type": "keyword",
-                "term": word,
-                "weight": weight
-            })
-
-    # Pattern-based scoring
-    for rule_name, rule in PATTERN_RULES.items():
-        if re.search(rule["pattern"], text_lower):
-            score += rule["weight"]
-            flags.append({
-                "type": "pattern",
-                "rule": rule_name,
-                "description": rule["description"],
-                "weight": rule["weight"]
-            })
-
-    return score, flags
+    return score_clause(clause, language)
+
+
+def score_spans_by_language(text, spans, languages):
+    """
+    Scores clause spans with the keyword set of each clause's own language.
+    One document scan per distinct language (usually just one).
+    """
+    scores = [None] * len(spans)
+
+    for language in set(languages):
+        indexes = [i for i, lang in enumerate(languages) if lang == language]
+        group = score_clause_spans(text, [spans[i] for i in indexes], language)
+        for i, score in zip(indexes, group):
+            scores[i] = score
+
+    return scores
+
+
+def rescore_changed_clauses(text, spans, languages, previous_clauses):
+    """
+    Reuses scores of clauses whose content hash is unchanged since the
+    previous analysis; only new or edited clauses are scored.
+    """
+    scores = []
+    for (start, end), language in zip(spans, languages):
+        previous = previous_clauses.get(clause_hash(text[start:end], language))
+        if previous is None:
+            previous = calculate_clause_risk(text[start:end], language)
+        scores.append(previous)
+    return scores
+
+
+def record_cached_clauses(text, cached):
+    """
+    Fills the clause store for an analysis served from the cache, so it
+    can be the baseline of a later incremental analysis. Risky clauses are
+    taken from the cached result in order; a clause only matches one when
+    its text (first 300 characters) and language agree. Clauses longer
+    than that are rescored, since a different clause can share the prefix.
+    """
+    analysis_id = cached.get("analysis_id")
+    if not analysis_id or analysis_id in clause_store:
+        return
+
+    detected_language = cached["detected_language"]
+    risky = cached["risky_clauses"]
+    next_risky = 0
+    clauses = {}
+
+    for start, end in split_into_clause_spans(text):
+        clause = text[start:end]
+        language = detect_clause_language(clause, detected_language)
+        score = (0, [])
+
+        if next_risky < len(risky):
+            candidate = risky[next_risky]
+            if candidate["clause_text"] == clause[:300] and candidate["language"] == language:
+                if len(clause) > 300:
+                    score = calculate_clause_risk(clause, language)
+                else:
+                    score = (candidate["clause_score"], candidate["flags"])
+                if score[0] > 0:
+                    next_risky += 1
+
+        clauses[clause_hash(clause, language)] = score
+
+    clause_store.put(analysis_id, detected_language, clauses)
 
 
 def classify_risk(score):
@@ -66,39 +90,160 @@ def classify_risk(score):
         return "HIGH"
 
 
-def analyze_contract(text, output_lang="en"):
+EMPTY_ANALYSIS = {
+    "risk_score": 0,
+    "risk_level": "LOW",
+    "clauses": [],
+    "detected_language": "unknown"
+}
+
+
+def build_clause_result(clause, score, flags, language):
+    return {
+        "clause_text": clause[:300],
+        "language": language,
+        "clause_score": score,
+        "flags": flags,
+        "explanations": generate_clause_explanation(flags)
+    }
+
+
+def localize_clauses(clause_results, output_lang):
+    """
+    Copies of the clause results with explanations in `output_lang`, all
+    translated in one batched call. Analyses are cached in English and
+    localized on the way out, so a translation outage (which falls back to
+    English) is never stored as a "hi" or "gu" result.
+    """
+    if not output_lang or output_lang == "en":
+        return clause_results
+
+    texts = list(dict.fromkeys(
+        text for clause_result in clause_results for text in clause_result["explanations"]
+    ))
+    translated = dict(zip(texts, translate_many(texts, output_lang)))
+
+    return [
+        dict(clause_result, explanations=[translated.get(text, text) for text in clause_result["explanations"]])
+        for clause_result in clause_results
+    ]
+
+
+def localize_analysis(result, output_lang):
+    if not result.get("risky_clauses"):
+        return result
+    return dict(result, risky_clauses=localize_clauses(result["risky_clauses"], output_lang))
+
+
+def build_analysis(analysis_id, total_score, detected_language, clause_results):
+    return {
+        "analysis_id": analysis_id,
+        "risk_score": total_score,
+        "risk_level": classify_risk(total_score),
+        "detected_language": detected_language,
+        "risky_clauses": clause_results
+    }
+
+
+def analyze_contract(text, output_lang="en", use_cache=True, previous_analysis_id=None):
     if not text.strip():
-        return {
-            "risk_score": 0,
-            "risk_level": "LOW",
-            "clauses": [],
-            "detected_language": "unknown"
-        }
+        return dict(EMPTY_ANALYSIS)
+
+    text = normalize_lines(text)
+    cache_key = content_key(text)
+
+    if use_cache:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            record_cached_clauses(text, cached)
+            return localize_analysis(cached, output_lang)
 
     detected_language = detect_language(text)
-    clauses = split_into_clauses(text)
+    spans = split_into_clause_spans(text)
+    languages = [
+        detect_clause_language(text[start:end], detected_language)
+        for start, end in spans
+    ]
+
+    previous_clauses = None
+    if previous_analysis_id:
+        previous_clauses = clause_store.get(previous_analysis_id, detected_language)
+
+    if previous_clauses is not None:
+        scores = rescore_changed_clauses(text, spans, languages, previous_clauses)
+    else:
+        scores = score_spans_by_language(text, spans, languages)
+
+    clause_store.put(cache_key, detected_language, {
+        clause_hash(text[start:end], language): score
+        for (start, end), language, score in zip(spans, languages, scores)
+    })
 
     total_score = 0
     clause_results = []
 
-    for clause in clauses:
-        score, flags = calculate_clause_risk(clause, detected_language)
-        explanations = generate_clause_explanation(flags)
+    for (start, end), language, (score, flags) in zip(spans, languages, scores):
         if score > 0:
-            clause_results.append({
-                "clause_text": clause[:300],
-                "clause_score": score,
-                "flags": flags,
-                "explanations": explanations
-            })
+            clause_results.append(
+                build_clause_result(text[start:end], score, flags, language)
+            )
 
         total_score += score
 
-    overall_level = classify_risk(total_score)
+    result = build_analysis(cache_key, total_score, detected_language, clause_results)
 
-    return {
-        "risk_score": total_score,
-        "risk_level": overall_level,
-        "detected_language": detected_language,
-        "risky_clauses": clause_results
-    }
+    if use_cache:
+        analysis_cache.put(cache_key, result)
+
+    return localize_analysis(result, output_lang)
+
+
+def iter_contract_analysis(text, output_lang="en"):
+    """
+    Streaming form of analyze_contract.
+    Yields ("clause", clause_result) for each risky clause as soon as it is
+    scored, then ("result", summary) with the aggregate score and level.
+    """
+    if not text.strip():
+        yield "result", dict(EMPTY_ANALYSIS)
+        return
+
+    text = normalize_lines(text)
+    cache_key = content_key(text)
+
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        record_cached_clauses(text, cached)
+        for clause_result in localize_clauses(cached["risky_clauses"], output_lang):
+            yield "clause", clause_result
+        summary = dict(cached)
+        summary.pop("risky_clauses")
+        yield "result", summary
+        return
+
+    detected_language = detect_language(text)
+
+    total_score = 0
+    clause_results = []
+    clause_scores = {}
+
+    for start, end in iter_clause_spans(text):
+        clause = text[start:end]
+        language = detect_clause_language(clause, detected_language)
+        score, flags = calculate_clause_risk(clause, language)
+        clause_scores[clause_hash(clause, language)] = (score, flags)
+        total_score += score
+
+        if score > 0:
+            clause_result = build_clause_result(clause, score, flags, language)
+            clause_results.append(clause_result)
+            yield "clause", localize_clauses([clause_result], output_lang)[0]
+
+    clause_store.put(cache_key, detected_language, clause_scores)
+
+    result = build_analysis(cache_key, total_score, detected_language, clause_results)
+    analysis_cache.put(cache_key, result)
+
+    summary = dict(result)
+    summary.pop("risky_clauses")
+    yield "result", summary
@@ -0,0 +1,186 @@
+# risk/rule_engine.py
+
+import re
+from bisect import bisect_right
+
+from .keywords import RISK_KEYWORDS, RISK_WEIGHTS
+
+PATTERN_RULES = {
+    "buyer_may_discretion": {
+        "pattern": r"(buyer|purchaser).*(sole discretion)",
+        "weight": 4,
+        "description": "Buyer has sole decision power."
+    },
+    "reject_without_reason": {
+        "pattern": r"(reject|refuse).*(without reason)",
+        "weight": 4,
+        "description": "Buyer can reject crop without justification."
+    },
+    "payment_delay": {
+        "pattern": r"(payment).*(after sale|at buyer convenience)",
+        "weight": 3,
+        "description": "Payment may be delayed."
+    }
+}
+
+
+def trie_pattern(words):
+    """
+    Regex matching any of `words`, with shared prefixes factored out
+    ("pay|payment|penalty" -> "p(?:ay(?:ment)?|enalty)"). re tries
+    the branches of a flat alternation one by one at every position; the
+    trie form branches on one character at a time, so the scan costs about
+    the same for 20 keywords as for 2000. Greedy optionals make the
+    longest keyword win at each position.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    All keywords of one language in a single compiled trie regex, so a
+    text is scanned once however many keywords there are. After each match the
+    search resumes one character past its start rather than at its end,
+    which keeps overlapping keywords ("अनुबंध समाप्त" and "समाप्ति" in
+    "अनुबंध समाप्ति"). At each position the longest keyword wins; shorter
+    keywords that are prefixes of it are recovered from `prefixes`.
+    """
+
+    def __init__(self, keywords):
+        indexes = {}
+        for index, word in enumerate(keywords):
+            if word:
+                indexes.setdefault(word, []).append(index)
+
+        # word -> [(length, keyword indexes)] for itself and its prefixes
+        self.prefixes = {
+            word: [(len(other), other_indexes)
+                   for other, other_indexes in indexes.items() if word.startswith(other)]
+            for word in indexes
+        }
+
+        self.pattern = re.compile(trie_pattern(indexes)) if indexes else None
+
+    def matches(self, text_lower):
+        """Yields (position, word) for the longest keyword starting at each position."""
+        if self.pattern is None:
+            return
+        search = self.pattern.search
+        match = search(text_lower)
+        while match:
+            yield match.start(), match.group()
+            match = search(text_lower, match.start() + 1)
+
+    def hits(self, text_lower):
+        found = set()
+        for _, word in self.matches(text_lower):
+            for _, indexes in self.prefixes[word]:
+                found.update(indexes)
+        return found
+
+
+def _build_matchers():
+    return {
+        lang: KeywordMatcher([word.lower() for word in words])
+        for lang, words in RISK_KEYWORDS.items()
+    }
+
+
+KEYWORD_MATCHERS = _build_matchers()
+
+COMPILED_PATTERN_RULES = [
+    (rule_name, re.compile(rule["pattern"]), rule)
+    for rule_name, rule in PATTERN_RULES.items()
+]
+
+
+def get_matcher(language):
+    return KEYWORD_MATCHERS.get(language, KEYWORD_MATCHERS["en"])
+
+
+def keyword_flags(keyword_indexes, language):
+    keywords = RISK_KEYWORDS.get(language, RISK_KEYWORDS["en"])
+
+    flags = []
+    for index in sorted(keyword_indexes):
+        word = keywords[index]
+        flags.append({
+            "type": "keyword",
+            "term": word,
+            "weight": RISK_WEIGHTS.get(word.lower(), 1)
+        })
+    return flags
+
+
+def pattern_flags(text_lower):
+    flags = []
+    for rule_name, compiled, rule in COMPILED_PATTERN_RULES:
+        if compiled.search(text_lower):
+            flags.append({
+                "type": "pattern",
+                "rule": rule_name,
+                "description": rule["description"],
+                "weight": rule["weight"]
+            })
+    return flags
+
+
+def score_flags(keyword_indexes, text_lower, language):
+    flags = keyword_flags(keyword_indexes, language) + pattern_flags(text_lower)
+    return sum(flag["weight"] for flag in flags), flags
+
+
+def score_clause(clause, language):
+    text_lower = clause.lower()
+    return score_flags(get_matcher(language).hits(text_lower), text_lower, language)
+
+
+def score_clause_spans(text, spans, language):
+    """
+    Scores every (start, end) clause span of `text` with one keyword scan
+    of the whole document; each match is assigned to its clause by binary
+    search. Returns a list of (score, flags) in span order.
+    """
+    if not spans:
+        return []
+
+    text_lower = text.lower()
+
+    # Lowercasing can change length for a few code points; offsets would
+    # no longer line up, so fall back to scanning clause by clause.
+    if len(text_lower) != len(text):
+        return [score_clause(text[start:end], language) for start, end in spans]
+
+    matcher = get_matcher(language)
+    starts = [start for start, _ in spans]
+    clause_hits = [set() for _ in spans]
+
+    for pos, word in matcher.matches(text_lower):
+        i = bisect_right(starts, pos) - 1
+        if i < 0:
+            continue
+        end = spans[i][1]
+        for length, indexes in matcher.prefixes[word]:
+            if pos + length <= end:
+                clause_hits[i].update(indexes)
+
+    return [
+        score_flags(hits, text_lower[start:end], language)
+        for hits, (start, end) in zip(clause_hits, spans)
+    ]
@@ -1,7 +1,229 @@
+import json
+import os
+import threading
+import time
+
 from deep_translator import GoogleTranslator
 
+TRANSLATOR_BACKEND = os.getenv("TRANSLATOR_BACKEND", "google")
+TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", os.path.join("cache", "translation_memory.json"))
+TRANSLATION_PREWARM_LANGS = [
+    lang.strip() for lang in os.getenv("TRANSLATION_PREWARM_LANGS", "hi,gu,pa,kn").split(",") if lang.strip()
+]
+
+# Google rejects requests above 5000 characters
+MAX_BATCH_CHARS = 4500
+# After a failed call, skip the network for this long and serve originals
+OFFLINE_COOLDOWN = 60
+
+
+class StubBackend:
+    """Offline backend: returns the input unchanged. Never persisted."""
+
+    persistent = False
+
+    def translate_many(self, texts, target_lang):
+        return list(texts)
+
+
+class GoogleBackend:
+    """
+    deep_translator's GoogleTranslator, one instance per target language.
+    Single-line texts are joined so a batch costs one HTTP call.
+    """
+
+    persistent = True
+
+    def __init__(self):
+        self._translators = {}
+
+    def _translator(self, target_lang):
+        translator = self._translators.get(target_lang)
+        if translator is None:
+            translator = GoogleTranslator(source="auto", target=target_lang)
+            self._translators[target_lang] = translator
+        return translator
+
+    def translate_many(self, texts, target_lang):
+        translator = self._translator(target_lang)
+
+        if any("\n" in text for text in texts):
+            return [translator.translate(text) for text in texts]
+
+        results = []
+        for chunk in _chunks(texts, MAX_BATCH_CHARS):
+            translated = translator.translate("\n".join(chunk)) or ""
+            lines = translated.split("\n")
+            if len(lines) != len(chunk):
+                lines = [translator.translate(text) for text in chunk]
+            results.extend(lines)
+        return results
+
+
+def _chunks(texts, max_chars):
+    chunk, size = [], 0
+    for text in texts:
+        if chunk and size + len(text) + 1 > max_chars:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text) + 1
+    if chunk:
+        yield chunk
+
+
+class TranslationService:
+    """
+    Translation memory keyed by (text, target_lang), optionally persisted
+    to a JSON file. Misses are translated in one batched backend call;
+    when the backend fails, originals are returned and the network is
+    skipped for OFFLINE_COOLDOWN seconds. Only results of a persistent
+    backend are remembered, so an offline (stub) run cannot leave English
+    behind as "hi" or "gu" translations.
+    """
+
+    def __init__(self, backend, memory_path=None):
+        self.backend = backend
+        self.fallback = StubBackend()
+        self.memory_path = memory_path
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._offline_until = 0.0
+        self._loaded = False
+
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if not self.memory_path or not os.path.exists(self.memory_path):
+            return
+        try:
+            with open(self.memory_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            for target_lang, entries in stored.items():
+                for text, translated in entries.items():
+                    self._memory[(text, target_lang)] = translated
+        except Exception:
+            pass
+
+    def _save(self):
+        if not self.memory_path:
+            return
+
+        stored = {}
+        for (text, target_lang), translated in self._memory.items():
+            stored.setdefault(target_lang, {})[text] = translated
+
+        try:
+            directory = os.path.dirname(self.memory_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.memory_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(stored, f, ensure_ascii=False)
+            os.replace(tmp_path, self.memory_path)
+        except Exception:
+            pass
+
+    def translate_many(self, texts, target_lang="hi"):
+        with self._lock:
+            self._load()
+            results = [self._memory.get((text, target_lang)) for text in texts]
+
+            misses = list(dict.fromkeys(
+                text for text, result in zip(texts, results) if result is None and text
+            ))
+            self.hits += len(texts) - len(misses)
+            self.misses += len(misses)
+
+        translated = {}
+        if misses:
+            translated = self._translate_misses(misses, target_lang)
+
+        return [
+            result if result is not None else translated.get(text, text)
+            for text, result in zip(texts, results)
+        ]
+
+    def _translate_misses(self, misses, target_lang):
+        if time.monotonic() < self._offline_until:
+            return dict(zip(misses, self.fallback.translate_many(misses, target_lang)))
+
+        try:
+            translated = self.backend.translate_many(misses, target_lang)
+        except Exception:
+            self._offline_until = time.monotonic() + OFFLINE_COOLDOWN
+            return dict(zip(misses, self.fallback.translate_many(misses, target_lang)))
+
+        if not self.backend.persistent:
+            return dict(zip(misses, translated))
+
+        result = {}
+        with self._lock:
+            for text, value in zip(misses, translated):
+                if value:
+                    self._memory[(text, target_lang)] = value
+                    result[text] = value
+            self._save()
+        return result
+
+    def translate(self, text, target_lang="hi"):
+        return self.translate_many([text], target_lang)[0]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "offline": time.monotonic() < self._offline_until
+            }
+
+
+def create_service():
+    backend = StubBackend() if TRANSLATOR_BACKEND == "stub" else GoogleBackend()
+    return TranslationService(backend, TRANSLATION_MEMORY_PATH)
+
+
+translation_service = create_service()
+
+
 def safe_translate(text, target_lang="hi"):
     try:
-        return GoogleTranslator(source="auto", target=target_lang).translate(text)
-    except:
+        return translation_service.translate(text, target_lang)
+    except Exception:
         return text
+
+
+def translate_many(texts, target_lang="hi"):
+    try:
+        return translation_service.translate_many(texts, target_lang)
+    except Exception:
+        return list(texts)
+
+
+def static_strings():
+    """Every fixed English string the risk engine can emit."""
+    from .explainer import EXPLANATION_MAP
+    from .rule_engine import PATTERN_RULES
+    from .summary_generator import SUMMARY_MAP, DEFAULT_SUMMARY, NO_RISK_SUMMARY
+
+    strings = list(EXPLANATION_MAP.values())
+    strings += [rule["description"] for rule in PATTERN_RULES.values()]
+    strings += list(SUMMARY_MAP.values()) + [DEFAULT_SUMMARY, NO_RISK_SUMMARY]
+    return list(dict.fromkeys(strings))
+
+
+def prewarm(target_langs=None):
+    """
+    Fills the translation memory for all static strings (one call per
+    language). Hits the network; app.py runs it once per worker process,
+    on that worker's first request.
+    """
+    strings = static_strings()
+    for target_lang in target_langs or TRANSLATION_PREWARM_LANGS:
+        translate_many(strings, target_lang)
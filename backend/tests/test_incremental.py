@@ -0,0 +1,52 @@
+import pytest
+
+import app as backend_app
+from risk.clause_store import clause_store
+from risk.result_cache import analysis_cache
+from risk.risk_engine import analyze_contract
+
+CONTRACT = "\n".join([
+    "The buyer may impose a penalty for any breach of this agreement at sole discretion.",
+    "Delivery shall happen at the farm gate within seven days of harvest.",
+    "Payment will be made after sale and the buyer may withhold payment " + "in full " * 40 + "if quality is poor.",
+    "Payment will be made after sale and the buyer may withhold payment " + "in full " * 40 + "without any notice.",
+    "The farmer keeps the right to sell surplus produce in the open market.",
+])
+
+
+@pytest.fixture(autouse=True)
+def empty_stores():
+    clause_store._entries.clear()
+    analysis_cache._entries.clear()
+    yield
+    clause_store._entries.clear()
+    analysis_cache._entries.clear()
+
+
+def test_cache_hit_records_the_same_clause_scores():
+    first = analyze_contract(CONTRACT, "en")
+    scored = clause_store.get(first["analysis_id"], first["detected_language"])
+
+    clause_store._entries.clear()
+    second = analyze_contract(CONTRACT, "en")
+
+    assert second == first
+    assert clause_store.get(first["analysis_id"], first["detected_language"]) == scored
+
+
+def test_cached_analysis_is_a_baseline_for_an_edit():
+    first = analyze_contract(CONTRACT, "en")
+    clause_store._entries.clear()
+    analyze_contract(CONTRACT, "en")
+
+    edited = CONTRACT.replace("seven days", "ten days")
+    incremental = analyze_contract(edited, "en", use_cache=False, previous_analysis_id=first["analysis_id"])
+    full = analyze_contract(edited, "en", use_cache=False)
+    assert incremental == full
+
+
+def test_analyze_rejects_non_string_previous_id():
+    client = backend_app.app.test_client()
+    response = client.post("/analyze", json={"text": CONTRACT, "lang": "en", "previous_analysis_id": ["x"]})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "previous_analysis_id must be a string"
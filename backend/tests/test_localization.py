@@ -0,0 +1,58 @@
+import pytest
+
+from risk.result_cache import analysis_cache
+from risk.risk_engine import analyze_contract
+from risk.translator import translation_service
+
+CONTRACT = "The buyer may reject the crop and withhold payment at sole discretion of the buyer."
+
+
+class FailingBackend:
+    persistent = True
+
+    def translate_many(self, texts, target_lang):
+        raise ConnectionError("translation API unreachable")
+
+
+class UpperBackend:
+    persistent = True
+
+    def translate_many(self, texts, target_lang):
+        return [f"[{target_lang}] {text}" for text in texts]
+
+
+@pytest.fixture
+def translation_backend(monkeypatch):
+    monkeypatch.setattr(translation_service, "memory_path", None)
+    monkeypatch.setattr(translation_service, "_memory", {})
+    monkeypatch.setattr(translation_service, "_offline_until", 0.0)
+    analysis_cache._entries.clear()
+    yield lambda backend: monkeypatch.setattr(translation_service, "backend", backend)
+    analysis_cache._entries.clear()
+
+
+def explanations(result):
+    return [text for clause in result["risky_clauses"] for text in clause["explanations"]]
+
+
+def test_translation_outage_is_not_cached(translation_backend):
+    translation_backend(FailingBackend())
+    english = analyze_contract(CONTRACT, "hi")
+    assert explanations(english)
+    assert not any(text.startswith("[hi]") for text in explanations(english))
+
+    translation_backend(UpperBackend())
+    translation_service._offline_until = 0.0
+    hindi = analyze_contract(CONTRACT, "hi")
+
+    assert hindi["analysis_id"] == english["analysis_id"]
+    assert all(text.startswith("[hi] ") for text in explanations(hindi))
+
+
+def test_cached_analysis_is_stored_in_english(translation_backend):
+    translation_backend(UpperBackend())
+    hindi = analyze_contract(CONTRACT, "hi")
+    cached = analysis_cache.get(hindi["analysis_id"])
+
+    assert explanations(cached) == [text[len("[hi] "):] for text in explanations(hindi)]
+    assert explanations(analyze_contract(CONTRACT, "en")) == explanations(cached)
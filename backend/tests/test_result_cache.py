@@ -0,0 +1,55 @@
+import os
+import sqlite3
+
+from risk import result_cache
+from risk.result_cache import AnalysisCache, content_key
+
+
+def test_memory_hit_miss_and_copies():
+    cache = AnalysisCache(max_size=2)
+    key = content_key("clause text")
+
+    assert cache.get(key) is None
+    cache.put(key, {"risk_score": 3, "risky_clauses": []})
+
+    first = cache.get(key)
+    first["analysis_id"] = "changed"
+    assert cache.get(key) == {"risk_score": 3, "risky_clauses": []}
+
+    cache.put("b", {"n": 2})
+    cache.put("c", {"n": 3})
+    assert cache.get(key) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
+
+
+def test_key_depends_on_text_and_rules_version(monkeypatch):
+    key = content_key("clause text")
+    assert key != content_key("clause text.")
+
+    monkeypatch.setattr(result_cache, "RULES_VERSION", "other")
+    assert content_key("clause text") != key
+
+
+def test_disk_tier_creates_directory_and_survives_restart(tmp_path):
+    db_path = str(tmp_path / "missing" / "analysis_cache.db")
+    AnalysisCache(db_path=db_path).put("k", {"risk_score": 1})
+    assert os.path.exists(db_path)
+
+    cache = AnalysisCache(db_path=db_path)
+    assert cache.get("k") == {"risk_score": 1}
+    assert cache.get("k") == {"risk_score": 1}
+    assert (cache.disk_hits, cache.hits) == (1, 1)
+
+
+def test_disk_tier_drops_entries_of_other_rule_versions(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "analysis_cache.db")
+    AnalysisCache(db_path=db_path).put("k", {"risk_score": 1})
+
+    monkeypatch.setattr(result_cache, "RULES_VERSION", "newer-rules")
+    cache = AnalysisCache(db_path=db_path)
+    assert cache.get("k") is None
+
+    rows = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM analysis_cache").fetchone()
+    assert rows == (0,)
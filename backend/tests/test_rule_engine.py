@@ -0,0 +1,91 @@
+import random
+import re
+
+import pytest
+
+from risk.clause_splitter import split_into_clause_spans
+from risk.keywords import RISK_KEYWORDS, RISK_WEIGHTS
+from risk.rule_engine import PATTERN_RULES, KeywordMatcher, score_clause, score_clause_spans, trie_pattern
+
+
+def reference_clause_risk(clause, language):
+    """Scoring as done before the rule engine: one regex search per keyword and rule."""
+    text_lower = clause.lower()
+    keywords = RISK_KEYWORDS.get(language, RISK_KEYWORDS["en"])
+
+    score = 0
+    flags = []
+
+    for word in keywords:
+        if re.search(re.escape(word.lower()), text_lower):
+            weight = RISK_WEIGHTS.get(word.lower(), 1)
+            score += weight
+            flags.append({"type": "keyword", "term": word, "weight": weight})
+
+    for rule_name, rule in PATTERN_RULES.items():
+        if re.search(rule["pattern"], text_lower):
+            score += rule["weight"]
+            flags.append({
+                "type": "pattern",
+                "rule": rule_name,
+                "description": rule["description"],
+                "weight": rule["weight"]
+            })
+
+    return score, flags
+
+
+FILLER = {
+    "en": "the buyer shall pay the farmer within seven days after sale at sole discretion without reason".split(),
+    "hi": "खरीदार किसान को सात दिनों में भुगतान करेगा फसल की गुणवत्ता".split(),
+}
+
+
+def random_document(language, rng, clauses=40):
+    keywords = RISK_KEYWORDS[language]
+    words = FILLER.get(language, FILLER["hi"]) + [w.upper() for w in keywords[:3]]
+    parts = []
+    for _ in range(clauses):
+        clause = [rng.choice(words) for _ in range(rng.randint(4, 14))]
+        for _ in range(rng.randint(0, 3)):
+            clause.insert(rng.randint(0, len(clause)), rng.choice(keywords))
+        # Glue two keywords together now and then so matches overlap
+        if rng.random() < 0.3:
+            clause.append(rng.choice(keywords) + rng.choice(keywords))
+        parts.append(" ".join(clause))
+    return rng.choice([". ", ";\n", "\n"]).join(parts)
+
+
+@pytest.mark.parametrize("language", sorted(RISK_KEYWORDS))
+def test_spans_score_like_reference(language):
+    rng = random.Random(language)
+    for _ in range(20):
+        text = random_document(language, rng)
+        spans = split_into_clause_spans(text)
+        expected = [reference_clause_risk(text[start:end], language) for start, end in spans]
+        assert score_clause_spans(text, spans, language) == expected
+
+
+@pytest.mark.parametrize("clause, language", [
+    ("Buyer may withhold payment at sole discretion and reject without reason", "en"),
+    ("अनुबंध समाप्ति पर जुर्माना और देरी से भुगतान रोकना", "hi"),
+    ("भुगतान रोके जाने पर करार रद्द", "bh"),
+    ("no risky words in this clause at all, just delivery dates", "en"),
+    ("PENALTY and Force Majeure apply", "xx"),
+])
+def test_clause_scores_like_reference(clause, language):
+    assert score_clause(clause, language) == reference_clause_risk(clause, language)
+
+
+def test_matcher_keeps_overlapping_and_prefix_keywords():
+    matcher = KeywordMatcher(["ab", "bc", "abcd", "a"])
+    assert matcher.hits("xabcd") == {0, 1, 2, 3}
+    assert matcher.hits("xyz") == set()
+    assert KeywordMatcher([]).hits("anything") == set()
+
+
+def test_trie_pattern_prefers_longest_keyword():
+    pattern = re.compile(trie_pattern(["pay", "payment", "penalty"]))
+    assert pattern.pattern == "p(?:ay(?:ment)?|enalty)"
+    assert pattern.match("payments").group() == "payment"
+    assert pattern.match("pays").group() == "pay"
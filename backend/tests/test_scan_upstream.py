@@ -0,0 +1,112 @@
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import app as backend_app
+from ocr import ocr_engine
+from ocr.backends import OCRSpaceBackend
+from utils.http_client import CircuitOpenError, HostBusyError, HttpClient, http_client
+
+OCR_URL = "http://127.0.0.1:9/parse/image"
+
+
+def png_bytes():
+    out = BytesIO()
+    Image.new("L", (200, 100), 255).save(out, format="PNG")
+    return out.getvalue()
+
+
+def pdf_bytes():
+    out = BytesIO()
+    Image.new("RGB", (200, 100), "white").save(out, format="PDF")
+    return out.getvalue()
+
+
+@pytest.fixture
+def open_breaker():
+    previous = ocr_engine.get_backend()
+    ocr_engine.set_backend(OCRSpaceBackend(api_key="test", url=OCR_URL))
+    breaker = http_client.pool(OCR_URL).breaker
+    breaker.opened_at = time.monotonic()
+    yield
+    breaker.record_success()
+    ocr_engine.set_backend(previous)
+
+
+@pytest.fixture
+def client():
+    backend_app.app.config["TESTING"] = True
+    backend_app.limiter.enabled = False
+    return backend_app.app.test_client()
+
+
+@pytest.mark.parametrize("filename, payload", [("scan.png", png_bytes), ("scan.pdf", pdf_bytes)])
+def test_scan_returns_503_while_breaker_is_open(client, open_breaker, filename, payload):
+    response = client.post(
+        "/scan",
+        data={"file": (BytesIO(payload()), filename)},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 503
+    assert response.get_json()["error"] == "OCR service temporarily unavailable"
+
+
+def test_open_breaker_propagates_from_ocr_engine(open_breaker):
+    with pytest.raises(CircuitOpenError):
+        ocr_engine.extract_text_from_bytes(png_bytes(), "scan.png", "none")
+
+
+def test_full_slot_pool_is_busy_not_open():
+    client = HttpClient(max_connections=1, acquire_timeout=0.05)
+    pool = client.pool(OCR_URL)
+    pool.slots.acquire()
+    try:
+        with pytest.raises(HostBusyError):
+            client.get(OCR_URL)
+    finally:
+        pool.slots.release()
+
+    assert pool.breaker.state == "closed"
+    assert not issubclass(HostBusyError, CircuitOpenError)
+
+
+def test_busy_host_is_not_counted_as_failure():
+    client = HttpClient(max_connections=1, failure_threshold=1, acquire_timeout=0.01)
+    pool = client.pool(OCR_URL)
+    pool.slots.acquire()
+    errors = []
+
+    def call():
+        try:
+            client.get(OCR_URL)
+        except HostBusyError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.slots.release()
+
+    assert len(errors) == 3
+    assert pool.breaker.state == "closed"
+
+
+def test_scan_does_not_analyze_ocr_error_text(client, monkeypatch):
+    monkeypatch.setattr(
+        backend_app, "extract_text_from_document",
+        lambda data, filename, preprocess=None: ocr_engine.OCR_FAILED + "tesseract is not installed",
+    )
+    response = client.post(
+        "/scan",
+        data={"file": (BytesIO(png_bytes()), "scan.png")},
+        content_type="multipart/form-data",
+    )
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
@@ -0,0 +1,208 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling a host whose circuit breaker is open."""
+
+
+class HostBusyError(requests.ConnectionError):
+    """Raised when no connection slot for a host frees up within acquire_timeout."""
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through. After `failure_threshold` consecutive failures
+    the breaker opens and calls fail immediately for `reset_timeout`
+    seconds; then one trial call is let through (half-open) and its outcome
+    closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds) with percentile estimates."""
+
+    BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        bucket = bisect_left(self.BOUNDS_MS, seconds * 1000)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.total += 1
+
+    def percentile(self, fraction):
+        """Upper bound (ms) of the bucket holding the given fraction of calls."""
+        with self._lock:
+            counts, total = list(self.counts), self.total
+        if not total:
+            return None
+
+        seen = 0
+        for bound, count in zip(self.BOUNDS_MS + (None,), counts):
+            seen += count
+            if seen >= fraction * total:
+                return bound
+        return None
+
+    def snapshot(self):
+        labels = [f"<={bound}ms" for bound in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}ms"]
+        with self._lock:
+            buckets = {label: count for label, count in zip(labels, self.counts) if count}
+            total = self.total
+        return {
+            "count": total,
+            "buckets": buckets,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+        }
+
+
+class HostPool:
+    """Keep-alive session, concurrency cap, breaker and latency stats of one host."""
+
+    def __init__(self, max_connections, failure_threshold, reset_timeout):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyHistogram()
+        self.in_flight = 0
+
+
+class HttpClient:
+    """
+    Shared HTTP layer for upstream APIs: one pooled session per host, at
+    most `max_connections` concurrent calls per host, and a circuit breaker
+    per host so an unhealthy upstream fails fast instead of making every
+    caller wait out its timeout.
+
+    Connection errors, timeouts and 5xx responses count as failures.
+    """
+
+    def __init__(self, max_connections=8, failure_threshold=5, reset_timeout=30.0,
+                 acquire_timeout=10.0):
+        self.max_connections = max_connections
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.acquire_timeout = acquire_timeout
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool(self, url):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            pool = self._pools.get(host)
+            if pool is None:
+                pool = self._pools[host] = HostPool(
+                    self.max_connections, self.failure_threshold, self.reset_timeout
+                )
+            return pool
+
+    def request(self, method, url, **kwargs):
+        pool = self.pool(url)
+
+        if not pool.slots.acquire(timeout=self.acquire_timeout):
+            raise HostBusyError(f"Too many concurrent calls to {urlsplit(url).netloc}")
+
+        if not pool.breaker.allow():
+            pool.slots.release()
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+
+        pool.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = pool.session.request(method, url, **kwargs)
+        except Exception:
+            pool.breaker.record_failure()
+            raise
+        finally:
+            pool.latency.observe(time.perf_counter() - started)
+            pool.in_flight -= 1
+            pool.slots.release()
+
+        if response.status_code >= 500:
+            pool.breaker.record_failure()
+        else:
+            pool.breaker.record_success()
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            pools = dict(self._pools)
+        return {
+            host: {
+                "breaker": pool.breaker.state,
+                "failures": pool.breaker.failures,
+                "in_flight": pool.in_flight,
+                "latency": pool.latency.snapshot(),
+            }
+            for host, pool in pools.items()
+        }
+
+
+http_client = HttpClient(
+    max_connections=int(os.getenv("HTTP_MAX_PER_HOST", 8)),
+    failure_threshold=int(os.getenv("HTTP_BREAKER_FAILURES", 5)),
+    reset_timeout=float(os.getenv("HTTP_BREAKER_RESET_SECONDS", 30)),
+)
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from flask import g, request
+from flask_limiter.util import get_remote_address
+from limits.storage import Storage
+
+from config import API_KEYS, API_KEY_LIMIT
+
+
+class SQLiteStorage(Storage):
+    """
+    Fixed-window counters in a local SQLite file, shared by every gunicorn
+    worker on the host so limits hold globally instead of per process.
+
+    Registered with `limits` as the sqlite:// scheme, e.g.
+    RATELIMIT_STORAGE_URI=sqlite:///var/run/samjhauta/ratelimit.db
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS counters (
+        key         TEXT PRIMARY KEY,
+        count       INTEGER NOT NULL,
+        expires_at  REAL NOT NULL
+    );
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = uri[len("sqlite://"):] if uri else "ratelimit.db"
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().executescript(self.SCHEMA)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; incr() opens its own write transaction
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        conn = self._conn()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT count, expires_at FROM counters WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                count, expires_at = amount, now + expiry
+            else:
+                count = row[0] + amount
+                expires_at = now + expiry if elastic_expiry else row[1]
+
+            conn.execute(
+                "INSERT OR REPLACE INTO counters (key, count, expires_at) VALUES (?, ?, ?)",
+                (key, count, expires_at),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+
+        return count
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT count FROM counters WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._conn().execute(
+            "SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._conn().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        cursor = self._conn().execute("DELETE FROM counters")
+        return cursor.rowcount
+
+    def clear(self, key):
+        self._conn().execute("DELETE FROM counters WHERE key = ?", (key,))
+
+
+# ----------------------------
+# Per-API-key quotas
+# ----------------------------
+
+API_KEY_DIGESTS = {hashlib.sha256(key.encode()).hexdigest() for key in API_KEYS}
+
+
+def api_key_id():
+    """
+    Short id of the request's X-API-Key when it is a configured key,
+    otherwise None. Computed once per request.
+    """
+    if "api_key_id" not in g:
+        key = request.headers.get("X-API-Key")
+        digest = hashlib.sha256(key.encode()).hexdigest() if key else None
+        g.api_key_id = digest[:16] if digest in API_KEY_DIGESTS else None
+    return g.api_key_id
+
+
+def rate_limit_key():
+    """Trusted clients are counted per API key, everyone else per IP."""
+    key_id = api_key_id()
+    return f"key:{key_id}" if key_id else get_remote_address()
+
+
+def tiered_limit(anonymous):
+    """Limit callable: `anonymous` for browsers, API_KEY_LIMIT for API key holders."""
+    def limit():
+        return API_KEY_LIMIT if api_key_id() else anonymous
+    return limit
@@ -1,2 +1,11 @@
 def normalize_text(text):
     return " ".join(text.split())
+
+
+def normalize_lines(text):
+    """
+    normalize_text applied line by line; keeps line breaks so clause
+    splitting sees the same structure.
+    """
+    lines = (normalize_text(line) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
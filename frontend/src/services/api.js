@@ -12,6 +12,25 @@ const CHATBOT_API = axios.create({
   timeout: 60000,
 });
 
+// 🔑 Chat session token: sent with every chatbot call so the conversation
+// context follows the user across backend workers
+const SESSION_TOKEN_KEY = "chatSessionToken";
+
+CHATBOT_API.interceptors.request.use((config) => {
+  const token = localStorage.getItem(SESSION_TOKEN_KEY);
+  if (token) {
+    config.headers["X-Session-Token"] = token;
+  }
+  return config;
+});
+
+CHATBOT_API.interceptors.response.use((res) => {
+  if (res.data?.session_token) {
+    localStorage.setItem(SESSION_TOKEN_KEY, res.data.session_token);
+  }
+  return res;
+});
+
 const OCR_API = axios.create({
   baseURL: BASE_URL_OCR,
   timeout: 60000,